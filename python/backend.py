@@ -0,0 +1,217 @@
+#==============================================================================
+#
+# Copyright (c) 2026, Qualcomm Innovation Center, Inc. All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+#
+#==============================================================================
+
+import os
+import time
+
+import numpy as np
+
+BACKENDS = ("qnn", "numpy")
+
+class Backend(object):
+    """
+    Inference backend interface used by Yolov8Seg and SAM2.
+    Mirrors the infertoypy.InferToy calls (init / set / run / get / destroy) and
+    accumulates the time spent in run() so callers can separate accelerator time
+    from Python-side overhead.
+    """
+    def __init__(self):
+        self.run_time = 0.0
+        self.run_count = 0
+
+    def init(self, model_path):
+        raise NotImplementedError
+
+    def set(self, index, data):
+        raise NotImplementedError
+
+    def run(self):
+        start = time.perf_counter()
+        res = self._run()
+        self.run_time += time.perf_counter() - start
+        self.run_count += 1
+        return res
+
+    def _run(self):
+        raise NotImplementedError
+
+    def get(self, index):
+        """
+        Returns (flat float32 array, length in bytes) like InferToy.get.
+        """
+        raise NotImplementedError
+
+    def destroy(self):
+        pass
+
+class QnnBackend(Backend):
+    """
+    QNN HTP backend through infertoypy, loading the HTP and system libraries from ADSP_LIBRARY_PATH.
+    """
+    def __init__(self):
+        super().__init__()
+        self.model = None
+
+    def init(self, model_path):
+        import infertoypy
+
+        self.model = infertoypy.InferToy()
+        return self.model.init([
+            "qnn-sample-app",
+            "--retrieve_context", model_path,
+            "--backend", os.path.join(os.environ['ADSP_LIBRARY_PATH'], "libQnnHtp.so"),
+            "--system_library", os.path.join(os.environ['ADSP_LIBRARY_PATH'], "libQnnSystem.so"),
+            "--log_level", "error",
+        ])
+
+    def set(self, index, data):
+        return self.model.set(index, data)
+
+    def _run(self):
+        return self.model.run()
+
+    def get(self, index):
+        return self.model.get(index)
+
+    def destroy(self):
+        if self.model is not None:
+            self.model.destroy()
+            self.model = None
+
+class NumpyBackend(Backend):
+    """
+    Deterministic CPU stand-in for off-device profiling and regression runs.
+    `synthesize(rng, inputs)` builds the output tensors of one run; the random
+    generator is seeded once in init(), so a replay produces the same outputs.
+    `latency` seconds are slept in run() to emulate accelerator time.
+    """
+    def __init__(self, synthesize, latency = 0.0, seed = 0):
+        super().__init__()
+        self.synthesize = synthesize
+        self.latency = latency
+        self.seed = seed
+        self.inputs = {}
+        self.outputs = []
+
+    def init(self, model_path):
+        self.rng = np.random.default_rng(self.seed)
+        return 0
+
+    def set(self, index, data):
+        self.inputs[index] = np.asarray(data, dtype=np.float32)
+        return 0
+
+    def _run(self):
+        if self.latency > 0:
+            time.sleep(self.latency)
+        self.outputs = [np.ascontiguousarray(out, dtype=np.float32).ravel()
+                        for out in self.synthesize(self.rng, self.inputs)]
+        return 0
+
+    def get(self, index):
+        out = self.outputs[index]
+        return out, out.nbytes
+
+def create_backend(backend, model_path, synthesize = None, **options):
+    """
+    Build and initialise a backend.
+
+    Args:
+        backend: "qnn", "numpy" or an already constructed Backend instance.
+        model_path: Context binary passed to init().
+        synthesize: Output generator used by the NumPy stand-in.
+        options: Extra NumpyBackend arguments (latency, seed).
+    """
+    if isinstance(backend, Backend):
+        model = backend
+    elif backend == "qnn":
+        model = QnnBackend(**options)
+    elif backend == "numpy":
+        model = NumpyBackend(synthesize, **options)
+    else:
+        raise ValueError(f"Unknown backend: {backend}")
+    model.init(model_path)
+    return model
+
+def load_model(name, factory, warmup = 1, event_queue = None):
+    """
+    Build a model with factory() and run `warmup` inferences on dummy inputs
+    through its warmup(), so the first real frame does not pay the first-run
+    costs of the context. Progress is put on `event_queue` as
+    ("model", (name, info)) with info["state"] going "loading", "warming",
+    "ready", plus the "load_s" and "warmup_s" timings; a failure is reported
+    as "failed" with its "error" and re-raised.
+    """
+    def report(**info):
+        if event_queue is not None:
+            event_queue.put(("model", (name, info)))
+
+    report(state="loading")
+    start = time.perf_counter()
+    try:
+        model = factory()
+        loaded = time.perf_counter()
+        report(state="warming", load_s=round(loaded - start, 3))
+        model.warmup(warmup)
+    except Exception as e:
+        report(state="failed", error=str(e))
+        raise
+    report(state="ready", load_s=round(loaded - start, 3), warmup_s=round(time.perf_counter() - loaded, 3), warmup=warmup)
+    return model
+
+def yolov8_synthetic(width, height, class_num, objects = 2):
+    """
+    Output generator for the YOLOv8-seg stand-in.
+    Emits `objects` confident boxes inside the letterboxed image area with
+    coefficients selecting a constant prototype, so every box decodes to a
+    filled mask. Output order matches the QNN context: protos, coef, scores, boxes.
+    """
+    blocks = int(height * width * (1 / 64 + 1 / 256 + 1 / 1024))
+    protos = np.zeros((1, height // 4, width // 4, 32), dtype=np.float32)
+    protos[..., 0] = 1.0
+
+    def synthesize(rng, inputs):
+        img = inputs[0].reshape(height, width, 3)
+        rows = np.flatnonzero(img.any(axis=(1, 2)))
+        cols = np.flatnonzero(img.any(axis=(0, 2)))
+        content_h = rows[-1] + 1 if len(rows) else height
+        content_w = cols[-1] + 1 if len(cols) else width
+
+        boxes = np.zeros((4, blocks), dtype=np.float32)
+        scores = rng.uniform(0.0, 0.05, (class_num, blocks)).astype(np.float32)
+        coef = np.zeros((32, blocks), dtype=np.float32)
+        for anchor in rng.choice(blocks, objects, replace=False):
+            w = rng.uniform(0.2, 0.5) * content_w
+            h = rng.uniform(0.2, 0.5) * content_h
+            cx = rng.uniform(w / 2, content_w - w / 2)
+            cy = rng.uniform(h / 2, content_h - h / 2)
+            boxes[:, anchor] = (cx, cy, w, h)
+            scores[rng.integers(class_num), anchor] = rng.uniform(0.7, 0.95)
+            coef[0, anchor] = 1.0
+        return [protos, coef, scores, boxes]
+
+    return synthesize
+
+def sam2_synthetic(size = 352):
+    """
+    Output generator for the SAM2 stand-in: one elliptical defect blob of
+    logits per input crop.
+    """
+    yy, xx = np.mgrid[:size, :size].astype(np.float32)
+
+    def synthesize(rng, inputs):
+        batch = inputs[0].size // (size * size * 3)
+        out = np.empty((batch, size, size), dtype=np.float32)
+        for i in range(batch):
+            cx, cy = rng.uniform(0.2, 0.8, 2) * size
+            rx, ry = rng.uniform(0.03, 0.15, 2) * size
+            dist = ((xx - cx) / rx) ** 2 + ((yy - cy) / ry) ** 2
+            out[i] = np.maximum(4.0 * (1.0 - dist), -16.0)
+        return [out]
+
+    return synthesize
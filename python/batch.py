@@ -0,0 +1,247 @@
+#==============================================================================
+#
+# Copyright (c) 2026, Qualcomm Innovation Center, Inc. All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+#
+#==============================================================================
+
+import os
+import sys
+import json
+import time
+import queue
+import signal
+import argparse
+import threading
+from datetime import datetime
+import multiprocessing as mp
+
+import cv2
+import numpy as np
+
+from yolov8 import Yolov8Seg
+from sam2 import SAM2
+from backend import BACKENDS
+from inspector import Inspector, FrameJob, YOLOV8_MODEL, SAM2_MODEL
+from pipeline import Pipeline
+from sources import iter_frames
+
+# Jobs queued in front of each stage of a worker's pipeline, as in the WebUI worker.
+PIPELINE_DEPTH = 1
+# Seconds between progress lines.
+PROGRESS_INTERVAL = 5.0
+
+def frame_key(record):
+    return record["source"], record["frame"]
+
+def load_done(path):
+    """
+    Keys of the frames already in the JSONL output `path`. A last line cut off
+    by an interrupted run is removed so appending continues on a clean line.
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    good = 0
+    with open(path, "rb+") as f:
+        for line in f:
+            try:
+                done.add(frame_key(json.loads(line)))
+            except (ValueError, KeyError):
+                break
+            good += len(line)
+        f.truncate(good)
+    return done
+
+def annotated_name(name):
+    """
+    "line.mp4#42" -> "line_000042.jpg", "part.png" -> "part.jpg"
+    """
+    if "#" in name:
+        base, index = name.rsplit("#", 1)
+        return f"{os.path.splitext(base)[0]}_{int(index):06d}.jpg"
+    return os.path.splitext(name)[0] + ".jpg"
+
+def record(job):
+    """
+    JSONL record of one processed frame: the Inspector sidecar plus the YOLOv8
+    segments and the accepted defect contours.
+    """
+    if job.boxes is None:
+        result = {"boxes": [], "scores": [], "class_ids": [], "defects": [], "segments": [], "contours": []}
+    else:
+        result = job.inspector.describe(job)
+        result.pop("time")
+        result["segments"] = [np.round(seg).astype(int).tolist() for seg in job.segments]
+        result["contours"] = [contour.reshape(-1, 2).tolist() for contour in job.contours]
+    return dict({"source": job.source, "frame": job.name}, **result)
+
+def batch_worker(tasks, results, options):
+    """
+    Worker process body.
+    Loads its own YOLOv8 and SAM2 instances and runs the (source, name, RGB frame)
+    tasks through the Inspector stages as a pipeline until it receives None.
+    Puts ("done", record) or ("failed", key) on `results` for every frame, then None.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    yolov8 = Yolov8Seg(YOLOV8_MODEL, 640, 640, 1, backend=options["backend"], **options["yolov8_options"])
+    sam2 = SAM2(SAM2_MODEL, backend=options["backend"], **options["sam2_options"])
+    inspector = Inspector(yolov8, sam2, target_class_id=options["class_id"], min_area=options["min_area"],
+                          conf_threshold=options["conf"], sam2_threshold=options["sam2_threshold"])
+    save_dir = options["save_dir"]
+
+    def detect(job):
+        result = inspector.detect(job)
+        # Frames without detections end here too, but are done, unlike failed ones.
+        job.detected = True
+        return result
+
+    def sink(job):
+        if save_dir and job.contours:
+            inspector.annotate(job.frame, job.segments, job.contours)
+            cv2.imwrite(os.path.join(save_dir, annotated_name(job.name)), cv2.cvtColor(job.frame, cv2.COLOR_RGB2BGR))
+        results.put(("done", record(job)))
+
+    def discard(job):
+        if job.detected and job.boxes is None:
+            results.put(("done", record(job)))
+        else:
+            results.put(("failed", (job.source, job.name)))
+
+    stages = [("detect", detect)] + inspector.stages()[1:]
+    pipeline = Pipeline(stages, sink, discard, depth=PIPELINE_DEPTH, drop=False)
+    pipeline.start()
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        source, name, frame = task
+        job = FrameJob(frame, datetime.now())
+        job.inspector, job.source, job.name, job.detected = inspector, source, name, False
+        pipeline.submit(job)
+    pipeline.stop()
+    results.put(None)
+
+def decode_ahead(sources, resolution, done, tasks, workers, counts, stop):
+    """
+    Decoder thread: reads every source and queues its frames not in `done`
+    as RGB, then one None per worker.
+    """
+    try:
+        for source in sources:
+            for name, frame in iter_frames(source, resolution):
+                if stop.is_set():
+                    return
+                if (source, name) in done:
+                    counts["skipped"] += 1
+                    continue
+                tasks.put((source, name, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
+                counts["queued"] += 1
+    finally:
+        for _ in range(workers):
+            tasks.put(None)
+
+def interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+def main():
+    parser = argparse.ArgumentParser(description="Run YOLOv8 + SAM2 over video files or image directories as fast as possible and write JSONL results")
+    parser.add_argument('sources', type=str, nargs='+', help='Video files, image files or image directories')
+    parser.add_argument('--output', type=str, required=True, help='JSONL file, one record per frame')
+    parser.add_argument('--resume', action='store_true', help='Skip the frames already in --output and append to it instead of overwriting')
+    parser.add_argument('--save-dir', type=str, default=None, help='Save annotated frames with defects to this directory (default: disabled)')
+    parser.add_argument('--backend', type=str, default='qnn', choices=BACKENDS, help='Inference backend (default: qnn)')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes, each with its own YOLOv8 and SAM2 instance (default: 1)')
+    parser.add_argument('--prefetch', type=int, default=8, help='Decoded frames queued ahead of the workers (default: 8)')
+    parser.add_argument('--resolution', type=int, nargs=2, default=None, help='Resize frames to width and height (default: source size)')
+    parser.add_argument('--class-id', type=int, default=0, help='Class ID to segment')
+    parser.add_argument('--min-area', type=int, default=10000, help='Minimum box area in pixels to segment (default: 10000)')
+    parser.add_argument('--conf', type=float, default=0.6, help='YOLOv8 confidence threshold (default: 0.6)')
+    parser.add_argument('--sam2-threshold', type=float, default=0.8, help='SAM2 mask probability threshold (default: 0.8)')
+    parser.add_argument('--yolov8-latency', type=float, default=0.0, help='Synthetic YOLOv8 run latency in seconds (numpy backend)')
+    parser.add_argument('--sam2-latency', type=float, default=0.0, help='Synthetic SAM2 run latency in seconds (numpy backend)')
+    args = parser.parse_args()
+
+    if args.backend == "qnn" and "ADSP_LIBRARY_PATH" not in os.environ:
+        raise RuntimeError("ADSP_LIBRARY_PATH is not set.")
+    for source in args.sources:
+        if not os.path.exists(source):
+            parser.error(f"source not found: {source}")
+    if args.save_dir:
+        os.makedirs(args.save_dir, exist_ok=True)
+
+    options = {
+        "backend": args.backend,
+        "yolov8_options": {"latency": args.yolov8_latency} if args.backend == "numpy" else {},
+        "sam2_options": {"latency": args.sam2_latency} if args.backend == "numpy" else {},
+        "class_id": args.class_id,
+        "min_area": args.min_area,
+        "conf": args.conf,
+        "sam2_threshold": args.sam2_threshold,
+        "save_dir": args.save_dir,
+    }
+
+    # Every record is flushed as soon as it is written, so the output itself is the checkpoint.
+    done = load_done(args.output) if args.resume else set()
+    output = open(args.output, "a" if args.resume else "w")
+
+    tasks = mp.Queue(maxsize=max(1, args.prefetch))
+    results = mp.Queue()
+    workers = [mp.Process(target=batch_worker, args=(tasks, results, options), daemon=True) for _ in range(args.workers)]
+    for worker in workers:
+        worker.start()
+    # Set after forking, so SIGTERM stops only the main process like Ctrl-C, leaving a resumable output behind.
+    signal.signal(signal.SIGTERM, interrupt)
+
+    counts = {"queued": 0, "skipped": 0, "done": 0, "defects": 0, "failed": 0}
+    stop = threading.Event()
+    decoder = threading.Thread(target=decode_ahead, name="decode", daemon=True,
+                               args=(args.sources, args.resolution, done, tasks, len(workers), counts, stop))
+    decoder.start()
+
+    start = last_report = time.time()
+    finished = 0
+    try:
+        while finished < len(workers):
+            try:
+                item = results.get(timeout=1.0)
+            except queue.Empty:
+                if not any(worker.is_alive() for worker in workers):
+                    print("All workers exited unexpectedly.", file=sys.stderr)
+                    break
+                continue
+            if item is None:
+                finished += 1
+                continue
+            kind, data = item
+            if kind == "done":
+                output.write(json.dumps(data, separators=(",", ":")) + "\n")
+                output.flush()
+                counts["done"] += 1
+                counts["defects"] += bool(data["contours"])
+            else:
+                counts["failed"] += 1
+            now = time.time()
+            if now - last_report >= PROGRESS_INTERVAL:
+                last_report = now
+                print(f"{counts['done']}/{counts['queued']} frames, {counts['done'] / (now - start):.2f} FPS")
+    except KeyboardInterrupt:
+        print("Interrupted, rerun with --resume to continue.")
+        stop.set()
+        # Frames still queued for the workers are dropped instead of flushed at exit.
+        tasks.cancel_join_thread()
+        for worker in workers:
+            worker.terminate()
+    finally:
+        output.close()
+
+    for worker in workers:
+        worker.join(timeout=5.0)
+    elapsed = time.time() - start
+    print(f"{counts['done']} frames in {elapsed:.2f} s: {counts['done'] / max(elapsed, 1e-9):.2f} FPS, "
+          f"{counts['defects']} with defects, {counts['skipped']} skipped, {counts['failed']} failed")
+
+if __name__ == '__main__':
+    main()
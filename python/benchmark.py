@@ -0,0 +1,190 @@
+#==============================================================================
+#
+# Copyright (c) 2026, Qualcomm Innovation Center, Inc. All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+#
+#==============================================================================
+
+import os
+import time
+import argparse
+import threading
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from yolov8 import Yolov8Seg
+from sam2 import SAM2
+from backend import BACKENDS
+from inspector import Inspector, FrameJob, YOLOV8_MODEL, SAM2_MODEL
+from pipeline import Pipeline
+from sources import iter_frames
+from writer import ResultWriter
+from tracker import Tracker
+
+# Jobs queued in front of each stage in --pipeline mode, as in the WebUI worker.
+PIPELINE_DEPTH = 1
+
+def percentiles(samples):
+    samples = np.asarray(samples) * 1000.0
+    return {
+        "mean": float(samples.mean()),
+        "p50": float(np.percentile(samples, 50)),
+        "p90": float(np.percentile(samples, 90)),
+        "p99": float(np.percentile(samples, 99)),
+        "max": float(samples.max()),
+    }
+
+def print_report(stages, frames, elapsed):
+    print(f"{'stage':<16}{'n':>7}{'mean':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}   (ms)")
+    for name, samples in stages.items():
+        if not samples:
+            continue
+        stats = percentiles(samples)
+        print(f"{name:<16}{len(samples):>7}" + "".join(f"{stats[k]:>10.2f}" for k in ("mean", "p50", "p90", "p99", "max")))
+    print(f"{frames} frames in {elapsed:.2f} s: {frames / elapsed:.2f} FPS")
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a video or image directory through the inference worker path and report per-stage latency")
+    parser.add_argument('source', type=str, help='Video file, image file or image directory')
+    parser.add_argument('--backend', type=str, default='qnn', choices=BACKENDS, help='Inference backend (default: qnn)')
+    parser.add_argument('--resolution', type=int, nargs=2, default=[1280, 720], help='Resize frames to width and height (default: 1280 720)')
+    parser.add_argument('--class-id', type=int, default=0, help='Class ID to detect')
+    parser.add_argument('--frames', type=int, default=200, help='Number of measured frames (default: 200)')
+    parser.add_argument('--warmup', type=int, default=5, help='Frames run before measuring (default: 5)')
+    parser.add_argument('--loop', action='store_true', help='Loop the source until enough frames were processed')
+    parser.add_argument('--save-dir', type=str, default=None, help='Save defect frames like the WebUI does (default: disabled)')
+    parser.add_argument('--track', action='store_true', help='Track objects to reuse SAM2 masks and save each object once, like the WebUI')
+    parser.add_argument('--pipeline', action='store_true', help='Overlap frames across stages like the WebUI worker')
+    parser.add_argument('--yolov8-latency', type=float, default=0.0, help='Synthetic YOLOv8 run latency in seconds (numpy backend)')
+    parser.add_argument('--sam2-latency', type=float, default=0.0, help='Synthetic SAM2 run latency in seconds (numpy backend)')
+    args = parser.parse_args()
+
+    if args.backend == "qnn" and "ADSP_LIBRARY_PATH" not in os.environ:
+        raise RuntimeError("ADSP_LIBRARY_PATH is not set.")
+
+    yolov8_options, sam2_options = {}, {}
+    if args.backend == "numpy":
+        yolov8_options = {"latency": args.yolov8_latency}
+        sam2_options = {"latency": args.sam2_latency}
+    yolov8 = Yolov8Seg(YOLOV8_MODEL, 640, 640, 1, backend=args.backend, **yolov8_options)
+    sam2 = SAM2(SAM2_MODEL, backend=args.backend, **sam2_options)
+
+    writer = None
+    if args.save_dir:
+        os.makedirs(args.save_dir, exist_ok=True)
+        writer = ResultWriter(args.save_dir)
+    tracker = Tracker() if args.track else None
+    inspector = Inspector(yolov8, sam2, writer=writer, target_class_id=args.class_id, tracker=tracker)
+
+    if args.pipeline:
+        run_pipelined(args, inspector, yolov8, sam2)
+    else:
+        run_sequential(args, inspector, yolov8, sam2)
+
+    inspector.flush()
+    if writer is not None:
+        writer.close()
+        print("writer " + ", ".join(f"{k} {v}" for k, v in writer.stats.as_dict().items()))
+
+def run_sequential(args, inspector, yolov8, sam2):
+    """
+    One frame at a time, splitting each frame's time into stages, accelerator time and Python overhead.
+    """
+    stage_names = ("decode", "convert", "yolov8", "crop", "sam2", "compose", "save",
+                   "yolov8 (accel)", "sam2 (accel)", "python", "total")
+    stages = {name: [] for name in stage_names}
+    frames = 0
+    elapsed = 0.0
+    warmup = args.warmup
+
+    source = iter_frames(args.source, args.resolution, args.loop)
+    while frames < args.frames:
+        read = time.perf_counter()
+        try:
+            name, frame = next(source)
+        except StopIteration:
+            break
+        # Source I/O and decoding are reported but, as in --pipeline mode, not part of the frame's time.
+        start = time.perf_counter()
+
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        converted = time.perf_counter()
+
+        yolov8_accel, sam2_accel = yolov8.model.run_time, sam2.model.run_time
+        inspector(frame, datetime.now())
+        end = time.perf_counter()
+
+        if warmup > 0:
+            warmup -= 1
+            continue
+
+        accel = (yolov8.model.run_time - yolov8_accel) + (sam2.model.run_time - sam2_accel)
+        stages["decode"].append(start - read)
+        stages["convert"].append(converted - start)
+        for stage, value in inspector.timings.items():
+            stages[stage].append(value)
+        stages["yolov8 (accel)"].append(yolov8.model.run_time - yolov8_accel)
+        if "sam2" in inspector.timings:
+            stages["sam2 (accel)"].append(sam2.model.run_time - sam2_accel)
+        stages["python"].append(end - start - accel)
+        stages["total"].append(end - start)
+        frames += 1
+        elapsed += end - start
+
+    if frames == 0:
+        print("No frames processed.")
+        return
+    print_report(stages, frames, elapsed)
+
+def run_pipelined(args, inspector, yolov8, sam2):
+    """
+    Frames overlap across the Inspector stages like in the WebUI worker. The
+    queues block instead of dropping so every frame is measured; "latency" is
+    submit-to-result time per frame.
+    """
+    stage_names = ("yolov8", "crop", "sam2", "compose", "save", "latency")
+    stages = {name: [] for name in stage_names}
+    done = []
+    lock = threading.Lock()
+
+    def sink(job):
+        end = time.perf_counter()
+        with lock:
+            done.append(end)
+            if job.measured:
+                for stage, value in job.timings.items():
+                    stages[stage].append(value)
+                stages["latency"].append(end - job.submitted)
+
+    pipeline = Pipeline(inspector.stages(), sink, sink, depth=PIPELINE_DEPTH, drop=False)
+    pipeline.start()
+
+    submitted = 0
+    source = iter_frames(args.source, args.resolution, args.loop)
+    for name, frame in source:
+        if submitted >= args.frames + args.warmup:
+            break
+        if submitted == args.warmup:
+            start = time.perf_counter()
+            accel = yolov8.model.run_time + sam2.model.run_time
+        job = FrameJob(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), datetime.now())
+        job.measured = submitted >= args.warmup
+        job.submitted = time.perf_counter()
+        pipeline.submit(job)
+        submitted += 1
+    pipeline.stop()
+
+    frames = submitted - args.warmup
+    if frames <= 0:
+        print("No frames processed.")
+        return
+    elapsed = done[-1] - start
+    accel = yolov8.model.run_time + sam2.model.run_time - accel
+    print_report(stages, frames, elapsed)
+    print(f"accelerator busy {accel:.2f} s ({100.0 * accel / elapsed:.1f}% of wall time, both contexts summed)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+#==============================================================================
+#
+# Copyright (c) 2026, Qualcomm Innovation Center, Inc. All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+#
+#==============================================================================
+
+import time
+import threading
+import multiprocessing as mp
+
+import cv2
+import numpy as np
+
+from capture import FrameGrabber, open_capture
+from metrics import METRICS
+from motion import MotionGate
+from scheduler import Scheduler
+from sharedring import SharedRing
+from stream import StreamHub
+
+# Bytes reserved per result slot for the pickled Overlay, on top of its optional BGRA tile.
+RESULT_META_SIZE = 1 << 20
+# MJPEG stream variants as name:quality[:width]; the first one is the default /video_feed.
+DEFAULT_STREAMS = ["main:95", "preview:60:640"]
+
+class CameraEndpoint(object):
+    """
+    What the inference process uses of a Camera: its name, class, result
+    directory, rings and stats. Unlike the Camera, with its capture and
+    threads, it can be passed to a process started from the fork server.
+    """
+    def __init__(self, name, target_class_id, save_dir, input_ring, result_ring, stats):
+        self.name = name
+        self.target_class_id = target_class_id
+        self.save_dir = save_dir
+        self.input_ring = input_ring
+        self.result_ring = result_ring
+        self.stats = stats
+
+# Serializes the pipeline threads updating CameraStats. Process-local, so an
+# inference process that dies cannot leave the WebUI's readers waiting on it.
+STATS_LOCK = threading.Lock()
+
+class CameraStats(object):
+    """
+    Per-camera inference counters in shared memory, written by the inference
+    process only: frames processed, frames without a target, frames discarded
+    (failed or dropped under load), and the average capture-to-result latency.
+    """
+    FIELDS = ("processed", "discarded", "latency", "no_target")
+
+    def __init__(self, alpha = 0.2):
+        self.alpha = alpha
+        self.values = mp.RawArray('d', len(self.FIELDS))
+
+    def processed(self, latency):
+        with STATS_LOCK:
+            count, average = self.values[0], self.values[2]
+            self.values[0] = count + 1
+            self.values[2] = latency if count == 0 else average + self.alpha * (latency - average)
+
+    def discarded(self):
+        with STATS_LOCK:
+            self.values[1] += 1
+
+    def no_target(self):
+        with STATS_LOCK:
+            self.values[3] += 1
+
+    def as_dict(self):
+        processed, discarded, latency, no_target = self.values[:]
+        return {"processed": int(processed), "discarded": int(discarded), "no_target": int(no_target),
+                "latency_ms": round(latency * 1000.0, 2)}
+
+class Camera(object):
+    """
+    Camera Class
+
+    One video source of the WebUI: its FrameGrabber, the rings to and from the
+    shared inference worker, its motion gate and scheduler, and the MJPEG hubs
+    of its streams. A loop thread takes the newest captured frame, dispatches,
+    overlays and encodes it, so a slow loop skips frames instead of letting
+    the camera buffers go stale.
+    """
+    def __init__(self,
+                 name: str,
+                 source: str,
+                 resolution: list,
+                 target_class_id: int,
+                 save_dir: str,
+                 is_active,
+                 interval,
+                 stage_stats,
+                 input_slots: int,
+                 ring_sync = None,
+                 share: float = 1.0,
+                 streams: list = None,
+                 motion_options: dict = None,
+                 scheduler_options: dict = None,
+                 overlay_tile: bool = False,
+                 capture_backend: str = "auto",
+                 gst_decoder: str = "jpegdec",
+                 ready: threading.Event = None):
+        """
+        Args:
+            name: Camera name used in routes and result paths.
+            source: Camera ID (int), Video Path (str) or GStreamer pipeline.
+            resolution: Tuple of (width, height).
+            target_class_id: Class ID to filter.
+            save_dir: Directory results of this camera are saved to.
+            is_active: Shared patrol flag.
+            interval: Shared fixed-mode inference interval.
+            stage_stats: StageStats of the shared inference pipeline.
+            input_slots: Slots of the input ring.
+            ring_sync: RingSync shared by the input rings of all cameras.
+            share: Fraction of the pipeline this camera may use in adaptive mode.
+            streams: MJPEG stream specs as "name:quality[:width]" (default DEFAULT_STREAMS).
+            motion_options: Keyword arguments of MotionGate.
+            scheduler_options: Keyword arguments of Scheduler.
+            overlay_tile: Results carry a pre-rendered overlay tile, so reserve room for a full-frame one.
+            capture_backend: One of capture.CAPTURE_BACKENDS.
+            gst_decoder: JPEG decoder element of the GStreamer camera pipeline.
+            ready: Set once the models are loaded; no frames are dispatched before (None: always ready).
+        """
+        self.name = name
+        self.source = source
+        self.target_class_id = target_class_id
+        self.save_dir = save_dir
+        self.is_active = is_active
+        if ready is None:
+            ready = threading.Event()
+            ready.set()
+        self.ready = ready
+
+        self.width, self.height = resolution
+        cap, self.capture_backend = open_capture(source, self.width, self.height, capture_backend, gst_decoder)
+        if cap.isOpened():
+            self.width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or self.width
+            self.height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or self.height
+        self.grabber = FrameGrabber(cap, (self.width, self.height), ready=ready)
+
+        # Frames travel through shared memory instead of pickled queues. Results are
+        # meta-only: the Overlay the inference process prepared for the stream loop.
+        self.input_ring = SharedRing((self.height, self.width, 3), np.uint8, slots=input_slots, sync=ring_sync)
+        tile_size = self.height * self.width * 4 if overlay_tile else 0
+        self.result_ring = SharedRing((0,), np.uint8, slots=3, meta_size=RESULT_META_SIZE + tile_size)
+        self.stats = CameraStats()
+
+        # Skips inference on frames that barely differ from the last inferred one.
+        self.motion = MotionGate(**(motion_options or {}))
+        # Decides when the next frame is due, from the interval or the measured pipeline.
+        self.scheduler = Scheduler(interval, stage_stats, self.input_ring, share=share, **(scheduler_options or {}))
+
+        # One loop captures, overlays and encodes every frame once; viewers only read the hubs.
+        self.hubs = {}
+        for spec in (streams or DEFAULT_STREAMS):
+            hub = StreamHub.parse(spec)
+            self.hubs[hub.name] = hub
+        self.default_stream = next(iter(self.hubs))
+        self.running = False
+        self.thread = None
+
+    def endpoint(self):
+        return CameraEndpoint(self.name, self.target_class_id, self.save_dir, self.input_ring, self.result_ring, self.stats)
+
+    def start(self):
+        self.running = True
+        self.grabber.start()
+        self.thread = threading.Thread(target=self.loop, name=f"camera-{self.name}", daemon=True)
+        self.thread.start()
+
+    def loop(self):
+        """
+        Stream thread shared by all viewers of this camera.
+        Takes the newest captured frame, feeds the input ring, overlays the latest
+        result and encodes each stream variant once per frame, skipping variants nobody watches.
+        """
+        latest = None
+        hold_count = 10
+        seq = 0
+        try:
+            while self.running:
+                captured = self.grabber.read(seq, timeout=1.0)
+                if captured is None:
+                    if self.grabber.finished:
+                        break
+                    continue
+                seq, frame, timestamp = captured
+
+                # Gated frames are not dispatched, so the next change is inferred right away.
+                now = time.time()
+                if self.is_active.value and self.ready.is_set() and self.scheduler.due(now):
+                    with METRICS.time("motion"):
+                        changed = self.motion(frame)
+                    if changed:
+                        with METRICS.time("dispatch"):
+                            dispatched = self.dispatch(frame, timestamp)
+                        if dispatched:
+                            self.scheduler.dispatched(now)
+
+                slot = self.result_ring.get_nowait()
+                if slot is not None:
+                    # The overlay is unpickled on get, so the slot can go back right away.
+                    self.result_ring.release(slot)
+                    latest = slot.meta
+                    hold_count = 10
+
+                watched = [hub for hub in self.hubs.values() if hub.clients > 0]
+                if latest is not None and self.is_active.value and hold_count > 0:
+                    if watched:
+                        with METRICS.time("overlay"):
+                            latest.draw(frame)
+                    hold_count -= 1
+
+                for hub in watched:
+                    with METRICS.time("stream_encode"):
+                        hub.encode(frame)
+        finally:
+            for hub in self.hubs.values():
+                hub.close()
+
+    def dispatch(self, frame, timestamp):
+        """
+        Convert a BGR frame to RGB straight into a free input ring slot, the only
+        colour conversion a frame goes through. Returns False when no slot was free.
+        """
+        slot = self.input_ring.claim()
+        if slot is None:
+            METRICS.inc("input_ring_full")
+            return False
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=slot.array)
+        self.input_ring.publish(slot, timestamp)
+        return True
+
+    def status(self):
+        status = {
+            "source": self.source,
+            "resolution": [self.width, self.height],
+            "class_id": self.target_class_id,
+            "capture": dict(self.grabber.status(), backend=self.capture_backend),
+            "motion": self.motion.status(),
+            "scheduler": self.scheduler.status(),
+        }
+        status.update(self.stats.as_dict())
+        return status
+
+    def stop(self):
+        """
+        Stop the loop and release the capture and rings.
+        """
+        self.running = False
+        self.grabber.stop()
+        if self.thread is not None and self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join(timeout=2.0)
+
+        # Unlinking only removes the names; mappings stay valid until every process lets go.
+        for ring in (self.input_ring, self.result_ring):
+            ring.shutdown()
+            ring.unlink()
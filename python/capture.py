@@ -0,0 +1,191 @@
+#==============================================================================
+#
+# Copyright (c) 2026, Qualcomm Innovation Center, Inc. All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+#
+#==============================================================================
+
+import time
+import threading
+from datetime import datetime
+
+import cv2
+
+from metrics import METRICS
+
+CAPTURE_BACKENDS = ("auto", "v4l2", "gstreamer")
+
+def gstreamer_pipeline(device, width, height, decoder = "jpegdec"):
+    """
+    MJPEG camera pipeline ending in a BGR appsink that keeps only the newest buffer.
+    `decoder` can name a hardware JPEG decoder element (e.g. v4l2jpegdec) where available.
+    """
+    return (f"v4l2src device={device} ! image/jpeg,width={width},height={height} ! "
+            f"{decoder} ! videoconvert ! video/x-raw,format=BGR ! "
+            f"appsink drop=true max-buffers=1 sync=false")
+
+def open_capture(source, width, height, backend = "auto", decoder = "jpegdec"):
+    """
+    Open a camera ID, device, video file, stream URL or GStreamer pipeline.
+
+    Args:
+        source: Camera ID (int or digit string), path/URL, or a pipeline containing "!".
+        width, height: Requested camera resolution.
+        backend: One of CAPTURE_BACKENDS. "v4l2" opens cameras through V4L2 directly,
+            "gstreamer" through gstreamer_pipeline(); both fall back to "auto" when unavailable.
+        decoder: JPEG decoder element of the GStreamer pipeline.
+    Returns (cv2.VideoCapture, name of the backend actually used).
+    """
+    try:
+        source = int(source)
+    except ValueError:
+        pass
+
+    if isinstance(source, str) and "!" in source:
+        return cv2.VideoCapture(source, cv2.CAP_GSTREAMER), "gstreamer"
+
+    if isinstance(source, int) or source.startswith("/dev/video"):
+        device = f"/dev/video{source}" if isinstance(source, int) else source
+        if backend == "gstreamer":
+            cap = cv2.VideoCapture(gstreamer_pipeline(device, width, height, decoder), cv2.CAP_GSTREAMER)
+            if cap.isOpened():
+                return cap, "gstreamer"
+            print(f"GStreamer capture of {device} unavailable, falling back to auto.")
+        elif backend == "v4l2":
+            cap = cv2.VideoCapture(source, cv2.CAP_V4L2)
+            if cap.isOpened():
+                _configure(cap, width, height)
+                return cap, "v4l2"
+            print(f"V4L2 capture of {device} unavailable, falling back to auto.")
+
+    cap = cv2.VideoCapture(source)
+    _configure(cap, width, height)
+    return cap, "auto"
+
+def _configure(cap, width, height):
+    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+    # cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'YUYV'))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    # Keep the driver queue short, so a grabbed frame is a fresh one (ignored by backends without it).
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+class FrameGrabber(object):
+    """
+    FrameGrabber Class
+
+    Reads a cv2.VideoCapture on its own thread as fast as the source delivers,
+    keeping only the newest BGR frame with the time it was captured. Readers
+    never hold back the camera; frames nobody took before the next one arrived
+    are counted as dropped. Video files are paced to their own frame rate.
+    """
+    def __init__(self, cap, size = None, window = 2.0, ready = None):
+        """
+        Args:
+            cap: Opened cv2.VideoCapture; the grabber releases it on stop().
+            size: (width, height) frames are resized to when they differ, None keeps them.
+            window: Seconds over which the capture FPS is measured.
+            ready: threading.Event a video file waits for before it starts playing,
+                so its first frames are not lost while the models load (None: play right away).
+        """
+        self.cap = cap
+        self.ready = ready
+        self.size = tuple(size) if size is not None else None
+        self.window = window
+        self.cond = threading.Condition()
+        self.frame = None
+        self.timestamp = None
+        self.seq = 0
+        self.taken = 0
+        self.dropped = 0
+        self.finished = False
+        self.running = False
+        self.stamps = []
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, name="capture", daemon=True)
+        self.thread.start()
+
+    def _loop(self):
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        frames = self.cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        # Only files report a frame count; cameras deliver at their own rate anyway.
+        period = 1.0 / fps if fps > 0 and frames > 0 else 0.0
+        # A file would lose its first frames; live cameras stream meanwhile.
+        if period > 0 and self.ready is not None:
+            while self.running and not self.ready.wait(timeout=0.5):
+                pass
+        next_time = time.time()
+        try:
+            while self.running:
+                start = time.perf_counter()
+                success, frame = self.cap.read()
+                if not success:
+                    break
+                timestamp = datetime.now()
+                if self.size is not None and (frame.shape[1], frame.shape[0]) != self.size:
+                    frame = cv2.resize(frame, self.size)
+                METRICS.observe("capture", time.perf_counter() - start)
+
+                with self.cond:
+                    if self.seq > self.taken:
+                        self.dropped += 1
+                        METRICS.inc("capture_dropped")
+                    self.frame, self.timestamp = frame, timestamp
+                    self.seq += 1
+                    now = time.time()
+                    self.stamps.append(now)
+                    while self.stamps and now - self.stamps[0] > self.window:
+                        self.stamps.pop(0)
+                    self.cond.notify_all()
+
+                if period > 0:
+                    next_time = max(next_time + period, time.time() - period)
+                    time.sleep(max(0.0, next_time - time.time()))
+        finally:
+            with self.cond:
+                self.finished = True
+                self.cond.notify_all()
+
+    def read(self, seq = 0, timeout = None):
+        """
+        Wait for a frame newer than `seq`. Returns (seq, BGR frame, capture datetime),
+        or None on timeout or once the source is exhausted. The frame is the
+        caller's to modify; the grabber never writes to it again.
+        """
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.seq > seq or self.finished, timeout) or self.seq <= seq:
+                return None
+            self.taken = self.seq
+            return self.seq, self.frame, self.timestamp
+
+    def fps(self):
+        with self.cond:
+            stamps = list(self.stamps)
+        if len(stamps) < 2:
+            return 0.0
+        return (len(stamps) - 1) / (stamps[-1] - stamps[0])
+
+    def status(self):
+        return {
+            "fps": round(self.fps(), 2),
+            "captured": self.seq,
+            "dropped": self.dropped,
+        }
+
+    def stop(self):
+        """
+        Stop grabbing and release the capture.
+        """
+        # The thread may be inside cap.read(); let it finish before releasing the capture.
+        self.running = False
+        if self.thread is not None and self.thread.is_alive():
+            self.thread.join(timeout=2.0)
+        with self.cond:
+            self.finished = True
+            self.cond.notify_all()
+        if self.cap.isOpened():
+            self.cap.release()
@@ -0,0 +1,136 @@
+#==============================================================================
+#
+# Copyright (c) 2026, Qualcomm Innovation Center, Inc. All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+#
+#==============================================================================
+
+import os
+import sqlite3
+import threading
+
+import cv2
+
+from writer import ENCODERS
+
+CATALOGUE_NAME = ".catalogue.db"
+THUMBS_DIR = ".thumbs"
+THUMB_WIDTH = 320
+RESULT_EXTS = tuple(ext for ext, flag in ENCODERS.values())
+
+def parse_time(name):
+    """
+    "2026_01_02_03_04_05_678[_suffix]" -> "2026-01-02 03:04:05.678"
+    """
+    return name[:10].replace("_", "-") + " " + name[11:19].replace("_", ":") + "." + name[20:23]
+
+class Catalogue(object):
+    """
+    Catalogue Class
+
+    SQLite index of the results in a save directory, so listing them does not
+    scan the directory. Rows get increasing ids in the order results are added,
+    which clients use as a cursor. Results in a subdirectory (one per camera)
+    are indexed as "subdir/name". Every process opens its own Catalogue; the
+    database is shared through the file.
+    """
+    def __init__(self, save_dir: str):
+        """
+        Args:
+            save_dir: Directory holding the results and the index.
+        """
+        self.save_dir = save_dir
+        self.thumbs_dir = os.path.join(save_dir, THUMBS_DIR)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(os.path.join(save_dir, CATALOGUE_NAME), timeout=10.0, check_same_thread=False)
+        with self.lock, self.db:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("CREATE TABLE IF NOT EXISTS results ("
+                            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                            "name TEXT UNIQUE NOT NULL, "
+                            "time TEXT NOT NULL)")
+
+    def rebuild(self):
+        """
+        Bring the index in line with the directory: add results saved while the
+        index was not running and forget the ones deleted since.
+        """
+        on_disk = []
+        for entry in os.scandir(self.save_dir):
+            if entry.name.startswith("."):
+                continue
+            if entry.is_dir():
+                on_disk.extend(f"{entry.name}/{f}" for f in os.listdir(entry.path) if f.endswith(RESULT_EXTS))
+            elif entry.name.endswith(RESULT_EXTS):
+                on_disk.append(entry.name)
+        # Ordered by capture time across cameras, so ids follow the time line.
+        on_disk.sort(key=lambda name: (os.path.basename(name), name))
+        with self.lock, self.db:
+            indexed = set(name for (name,) in self.db.execute("SELECT name FROM results"))
+            self.db.executemany("DELETE FROM results WHERE name = ?", [(name,) for name in indexed.difference(on_disk)])
+            self.db.executemany("INSERT OR IGNORE INTO results (name, time) VALUES (?, ?)",
+                                [(name, parse_time(os.path.splitext(os.path.basename(name))[0])) for name in on_disk if name not in indexed])
+
+    def add(self, filename, timestamp = None):
+        """
+        Index a saved result. Returns its (id, name, time) row, or None if it was already indexed.
+        """
+        time = timestamp.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3] if timestamp is not None \
+            else parse_time(os.path.splitext(os.path.basename(filename))[0])
+        with self.lock, self.db:
+            cursor = self.db.execute("INSERT OR IGNORE INTO results (name, time) VALUES (?, ?)", (filename, time))
+        return (cursor.lastrowid, filename, time) if cursor.rowcount else None
+
+    def version(self, subdir = None):
+        """
+        (newest id, row count); changes whenever results are added or removed.
+        """
+        where, args = self._subdir(subdir)
+        with self.lock:
+            latest, count = self.db.execute("SELECT COALESCE(MAX(id), 0), COUNT(*) FROM results WHERE " + where, args).fetchone()
+        return latest, count
+
+    def query(self, since = 0, limit = None, subdir = None):
+        """
+        Rows (id, name, time) with an id above `since`, oldest first, optionally
+        only those in `subdir`.
+        """
+        where, args = self._subdir(subdir)
+        with self.lock:
+            return self.db.execute("SELECT id, name, time FROM results WHERE id > ? AND " + where + " ORDER BY id LIMIT ?",
+                                   (since,) + args + (-1 if limit is None else limit,)).fetchall()
+
+    @staticmethod
+    def _subdir(subdir):
+        if subdir is None:
+            return "1", ()
+        # substr() instead of LIKE, so "_" and "%" in the name match literally.
+        prefix = subdir + "/"
+        return "substr(name, 1, ?) = ?", (len(prefix), prefix)
+
+    def thumbnail(self, filename):
+        """
+        Name of the thumbnail of a result inside thumbs_dir, created on first use.
+        Returns None when the result does not exist.
+        """
+        thumb = os.path.splitext(filename)[0] + ".jpg"
+        path = os.path.join(self.thumbs_dir, thumb)
+        if os.path.exists(path):
+            return thumb
+
+        image = cv2.imread(os.path.join(self.save_dir, filename))
+        if image is None:
+            return None
+        height = max(1, round(image.shape[0] * THUMB_WIDTH / image.shape[1]))
+        image = cv2.resize(image, (THUMB_WIDTH, height), interpolation=cv2.INTER_AREA)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Concurrent requests for the same thumbnail each write their own temporary file.
+        tmp = f"{path}.{threading.get_ident()}.tmp.jpg"
+        cv2.imwrite(tmp, image, [cv2.IMWRITE_JPEG_QUALITY, 80])
+        os.replace(tmp, path)
+        return thumb
+
+    def close(self):
+        with self.lock:
+            self.db.close()
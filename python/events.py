@@ -0,0 +1,89 @@
+#==============================================================================
+#
+# Copyright (c) 2026, Qualcomm Innovation Center, Inc. All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+#
+#==============================================================================
+
+import json
+import threading
+from collections import deque
+
+class EventBus(object):
+    """
+    EventBus Class
+
+    Fans events out to Server-Sent Events clients. Every event gets an
+    increasing id and the last `history` events are kept, so a client that
+    reconnects with Last-Event-ID receives what it missed. Waiting clients
+    cost nothing but a keepalive comment now and then.
+    """
+    def __init__(self, history: int = 256, keepalive: float = 15.0, retry: int = 2000):
+        """
+        Args:
+            history: Number of recent events kept for reconnecting clients.
+            keepalive: Seconds between keepalive comments on an idle stream.
+            retry: Reconnect delay suggested to clients, in milliseconds.
+        """
+        self.events = deque(maxlen=history)
+        self.keepalive = keepalive
+        self.retry = retry
+        self.cond = threading.Condition()
+        self.seq = 0
+        self.closed = False
+
+    def publish(self, kind, data):
+        with self.cond:
+            self.seq += 1
+            self.events.append((self.seq, kind, data))
+            self.cond.notify_all()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def _pending(self, last_id):
+        return [event for event in self.events if event[0] > last_id]
+
+    def subscribe(self, last_id = None, prepare = None):
+        """
+        Generator of SSE messages, starting after event `last_id` when given.
+        `prepare(kind, data)` returns what this client is sent as the data of
+        an event, e.g. with URLs resolved against the host it connected to.
+        """
+        with self.cond:
+            # An id from before a restart means nothing here; start from now.
+            if last_id is None or last_id > self.seq:
+                last_id = self.seq
+        yield f"retry: {self.retry}\n\n"
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.seq > last_id or self.closed, timeout=self.keepalive)
+                if self.closed:
+                    return
+                pending = self._pending(last_id)
+            if not pending:
+                yield ": keepalive\n\n"
+                continue
+            for seq, kind, data in pending:
+                if prepare is not None:
+                    data = prepare(kind, data)
+                yield f"id: {seq}\nevent: {kind}\ndata: {json.dumps(data)}\n\n"
+            last_id = pending[-1][0]
+
+class EventChannel(object):
+    """
+    The put() side of an event queue over one end of a Pipe, for a child
+    process that may die and be restarted. Unlike an mp.Queue shared with
+    other processes, it dies with the process without leaving a lock held or
+    half a message behind for the next one. Safe to share between threads.
+    """
+    def __init__(self, conn):
+        self.conn = conn
+        self.lock = threading.Lock()
+
+    def put(self, event):
+        with self.lock:
+            self.conn.send(event)
@@ -0,0 +1,321 @@
+#==============================================================================
+#
+# Copyright (c) 2026, Qualcomm Innovation Center, Inc. All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+#
+#==============================================================================
+
+import os
+import time
+
+import cv2
+import numpy as np
+
+from metrics import METRICS
+from utils import rle_encode, group_boxes
+
+RESOURCES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../resources")
+YOLOV8_MODEL = os.path.join(RESOURCES_DIR, "cutoff_yolov8s-seg_qcs8550_w8a16.qnn236.ctx.bin")
+SAM2_MODEL = os.path.join(RESOURCES_DIR, "sam2unet_large_fix_w8a16.qnn231.ctx.bin")
+
+class FrameJob(object):
+    """
+    One frame on its way through the Inspector stages.
+    `slot` is the ring slot the frame lives in, if any, and `camera` the index
+    of the source it came from; `timings` collects
+    the wall time of each stage in seconds. `indices` holds the index into
+    `boxes` of each roi. With a tracker, `tracks` and
+    `signatures` hold the Track and appearance signature of each roi and
+    `pending` the indices of the rois that SAM2 has to segment. `masks` holds
+    the (x, y, mask) defect regions merged from `defect_masks`.
+    """
+    def __init__(self, frame, timestamp, slot = None, camera = 0):
+        self.frame = frame
+        self.timestamp = timestamp
+        self.slot = slot
+        self.camera = camera
+        self.boxes = None
+        self.segments = None
+        self.rois = []
+        self.indices = []
+        self.crops = []
+        self.defect_masks = []
+        self.masks = None
+        self.contours = []
+        self.tracks = []
+        self.signatures = []
+        self.pending = []
+        self.timings = {}
+
+class Inspector(object):
+    """
+    Inspector Class
+
+    The per-frame YOLOv8 -> crop -> SAM2 -> contour path of the inference worker,
+    independent of Flask so it can be driven by the WebUI and the offline tools alike.
+    The path is split into the STAGES methods, each taking and returning a FrameJob,
+    so it can run sequentially through __call__ or as a Pipeline.
+
+    Without a tracker every frame with defects is saved. With one, SAM2 only
+    runs for new or changed tracks and each track with defects is saved once,
+    from its best capture, when it retires.
+    """
+    STAGES = ("detect", "prepare", "segment", "compose")
+
+    def __init__(self,
+                 yolov8,
+                 sam2,
+                 writer = None,
+                 target_class_id: int = 0,
+                 min_area: int = 10000,
+                 tracker = None,
+                 conf_threshold: float = 0.6,
+                 sam2_threshold: float = 0.8,
+                 classes: list = None):
+        """
+        Args:
+            yolov8: Yolov8Seg instance.
+            sam2: SAM2 instance, or anything with the same batch() method.
+            writer: ResultWriter for annotated defect frames (None disables saving).
+            target_class_id: Class ID whose boxes are passed to SAM2.
+            min_area: Minimum box area in pixels for a box to be segmented.
+            tracker: Tracker for SAM2 reuse and one save per object (None disables tracking).
+            conf_threshold: YOLOv8 confidence a box needs to be kept.
+            sam2_threshold: SAM2 mask probability a pixel needs to count as defect.
+            classes: Class IDs YOLOv8 decodes, None for all. Restricting it to
+                [target_class_id] skips the boxes that would never be segmented.
+        """
+        self.yolov8 = yolov8
+        self.sam2 = sam2
+        self.writer = writer
+        self.target_class_id = target_class_id
+        self.min_area = min_area
+        self.tracker = tracker
+        self.conf_threshold = conf_threshold
+        self.sam2_threshold = sam2_threshold
+        self.classes = classes
+        self.timings = {}
+
+    def __call__(self, frame, timestamp):
+        """
+        Process one RGB frame, saving an annotated copy when defects are found.
+        Returns (masks, segments), or None when YOLOv8 finds nothing; masks are
+        the (x, y, mask) defect regions of merge().
+        `timings` holds the per-stage wall time of the call afterwards.
+        """
+        job = FrameJob(frame, timestamp)
+        self.timings = job.timings
+        for name, stage in self.stages():
+            job = stage(job)
+            if job is None:
+                return None
+        return job.masks, job.segments
+
+    def stages(self):
+        return [(name, getattr(self, name)) for name in self.STAGES]
+
+    def detect(self, job):
+        start = time.perf_counter()
+        job.boxes, job.segments = self.yolov8(job.frame, self.conf_threshold, classes=self.classes)
+        job.timings['yolov8'] = time.perf_counter() - start
+        # With a tracker, empty frames go on to prepare() so they count as a miss in frame order.
+        return job if job.boxes is not None or self.tracker is not None else None
+
+    def prepare(self, job):
+        if job.boxes is None:
+            self.tracker.update([], [])
+            self.expire()
+            return None
+        start = time.perf_counter()
+        targets = self.targets(job.frame, job.boxes, job.segments)
+        job.rois = [roi for i, roi in targets]
+        job.indices = [i for i, roi in targets]
+        job.defect_masks = [None] * len(targets)
+        if self.tracker is not None:
+            job.tracks = self.tracker.update(job.rois, [int(job.boxes[i][5]) for i, roi in targets])
+
+        for k, (i, (x1, y1, x2, y2)) in enumerate(targets):
+            if self.tracker is not None:
+                signature = self.tracker.signature(job.frame[y1:y2, x1:x2])
+                job.signatures.append(signature)
+                cached = self.tracker.cached_mask(job.tracks[k], job.rois[k], signature)
+                if cached is not None:
+                    job.defect_masks[k] = cached
+                    continue
+            job.pending.append(k)
+            job.crops.append(self.crop(job.frame, job.rois[k], job.segments[i]))
+        job.timings['crop'] = time.perf_counter() - start
+        return job
+
+    def segment(self, job):
+        start = time.perf_counter()
+        for k, mask in zip(job.pending, self.sam2.batch(job.crops, self.sam2_threshold)):
+            job.defect_masks[k] = mask
+            if self.tracker is not None:
+                self.tracker.cache(job.tracks[k], job.rois[k], job.signatures[k], mask)
+        job.timings['sam2'] = time.perf_counter() - start
+        return job
+
+    def compose(self, job):
+        start = time.perf_counter()
+        job.masks, job.contours = self.merge(job.rois, job.defect_masks)
+        job.timings['compose'] = time.perf_counter() - start
+
+        if self.tracker is not None:
+            start = time.perf_counter()
+            self.offer(job)
+            for track in self.tracker.retire():
+                self.persist(track)
+            job.timings['save'] = time.perf_counter() - start
+        elif job.contours and self.writer is not None:
+            start = time.perf_counter()
+            # The frame may live in a ring slot that is reused once the job is published.
+            image = job.frame.copy()
+            self.annotate(image, job.segments, job.contours)
+            self.writer.submit(image, job.timestamp, self.describe(job) if self.writer.sidecar else None)
+            job.timings['save'] = time.perf_counter() - start
+        return job
+
+    def targets(self, frame, boxes, segments):
+        """
+        (box index, roi) of every large enough target-class box with a YOLOv8 mask.
+        """
+        height, width = frame.shape[:2]
+        targets = []
+        for i in range(len(boxes)):
+            cls_id = int(boxes[i][5])
+            if cls_id == self.target_class_id:
+                x1, y1, x2, y2 = [int(t) for t in boxes[i][:4]]
+                x1, y1 = max(0, x1), max(0, y1)
+                x2, y2 = min(width, x2), min(height, y2)
+
+                if (x2 - x1) * (y2 - y1) < self.min_area:
+                    continue
+
+                if len(segments[i]) > 0:
+                    targets.append((i, (x1, y1, x2, y2)))
+        return targets
+
+    def crop(self, frame, roi, segment):
+        """
+        Cut the roi out of the frame, keeping only the pixels inside the YOLOv8 mask.
+        The polygon is filled and applied within the roi only.
+        """
+        height, width = frame.shape[:2]
+        x1, y1, x2, y2 = roi
+        poly = np.int32([segment])
+        # Filled over the roi and the polygon's own bounds, so the polygon is clipped only
+        # at the frame edges, as when filling the whole frame; a segment rarely leaves its roi by more than a pixel.
+        px, py, pw, ph = cv2.boundingRect(poly)
+        fx1, fy1 = max(0, min(x1, px)), max(0, min(y1, py))
+        fx2, fy2 = min(width, max(x2, px + pw)), min(height, max(y2, py + ph))
+        mask = np.zeros((fy2 - fy1, fx2 - fx1), dtype=np.uint8)
+        cv2.fillPoly(mask, poly, 255, offset=(-fx1, -fy1))
+
+        crop = frame[y1:y2, x1:x2]
+        return cv2.bitwise_and(crop, crop, mask=mask[y1 - fy1:y2 - fy1, x1 - fx1:x2 - fx1])
+
+    def merge(self, rois, defect_masks):
+        """
+        OR the SAM2 masks of overlapping or touching rois together, one mask per
+        group covering only the group's bounding rectangle, and extract the defect
+        contours of each group in frame coordinates. Cost follows the box sizes,
+        not the frame size.
+        Returns the (x, y, mask) regions, each a 0/255 mask with its top-left pixel
+        at (x, y), and the contours within the accepted area range.
+        """
+        regions, valid_contours = [], []
+        for group in group_boxes(rois):
+            gx1, gy1 = min(rois[k][0] for k in group), min(rois[k][1] for k in group)
+            gx2, gy2 = max(rois[k][2] for k in group), max(rois[k][3] for k in group)
+            mask = np.zeros((gy2 - gy1, gx2 - gx1), dtype=np.uint8)
+            for k in group:
+                x1, y1, x2, y2 = rois[k]
+                area = mask[y1 - gy1:y2 - gy1, x1 - gx1:x2 - gx1]
+                np.maximum(area, defect_masks[k], out=area)
+            mask = cv2.compare(mask, 0, cv2.CMP_GT)
+            regions.append((gx1, gy1, mask))
+
+            with METRICS.time("contours"):
+                contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE, offset=(gx1, gy1))
+            valid_contours.extend(c for c in contours if (cv2.contourArea(c) > 10 and cv2.contourArea(c) < 100000))
+        return regions, valid_contours
+
+    def annotate(self, frame, segments, contours):
+        cv2.drawContours(frame, contours, -1, (0, 255, 0), 3)
+        for seg in segments:
+            cv2.polylines(frame, np.int32([seg]), True, (255, 0, 0), 3)
+
+    def describe(self, job):
+        """
+        Sidecar content of a saved frame: the YOLOv8 boxes and the RLE-encoded
+        SAM2 mask of every segmented roi.
+        """
+        return {
+            "time": job.timestamp.isoformat(timespec="milliseconds"),
+            "boxes": [[round(float(v), 1) for v in box[:4]] for box in job.boxes],
+            "scores": [round(float(box[4]), 3) for box in job.boxes],
+            "class_ids": [int(box[5]) for box in job.boxes],
+            "defects": [dict({"roi": list(roi), "mask": rle_encode(mask)}, **({"track_id": job.tracks[k].id} if job.tracks else {}))
+                        for k, (roi, mask) in enumerate(zip(job.rois, job.defect_masks))],
+        }
+
+    def offer(self, job):
+        """
+        Offer this frame as the best capture of every track it shows a defect on.
+        Quality is detection confidence times crop sharpness (variance of the Laplacian).
+        """
+        copy = []
+        def capture():
+            # One capture of the frame, shared by all tracks that keep it.
+            if not copy:
+                copy.append(self.capture(job))
+            return copy[0]
+
+        for i, (x1, y1, x2, y2), track, mask in zip(job.indices, job.rois, job.tracks, job.defect_masks):
+            if cv2.countNonZero(mask) <= 10:
+                continue
+            gray = cv2.cvtColor(job.frame[y1:y2, x1:x2], cv2.COLOR_RGB2GRAY)
+            quality = float(job.boxes[i][4]) * cv2.Laplacian(gray, cv2.CV_32F).var()
+            self.tracker.offer(track, quality, capture)
+
+    def capture(self, job):
+        """
+        What persist() needs of a job, detached from its ring slot: a FrameJob
+        with a copy of the frame and the detections, but no slot.
+        """
+        kept = FrameJob(job.frame.copy(), job.timestamp, camera=job.camera)
+        kept.boxes, kept.segments, kept.contours = job.boxes, job.segments, job.contours
+        kept.rois, kept.defect_masks, kept.tracks = job.rois, job.defect_masks, job.tracks
+        return kept
+
+    def persist(self, track):
+        """
+        Save the best capture of a retired track, with the track id in name and sidecar.
+        """
+        if track.best is None or self.writer is None:
+            return
+        quality, job = track.best
+        self.annotate(job.frame, job.segments, job.contours)
+        meta = None
+        if self.writer.sidecar:
+            meta = self.describe(job)
+            meta["track_id"] = track.id
+        self.writer.submit(job.frame, job.timestamp, meta, suffix=f"_t{track.id}")
+
+    def expire(self):
+        """
+        Save the tracks that missed too many frames or went idle, e.g. while no frames are processed.
+        """
+        if self.tracker is not None:
+            for track in self.tracker.retire():
+                self.persist(track)
+
+    def flush(self):
+        """
+        Save the best capture of every remaining track, e.g. before shutting down.
+        """
+        if self.tracker is not None:
+            for track in self.tracker.retire(everything=True):
+                self.persist(track)
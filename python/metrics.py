@@ -0,0 +1,160 @@
+#==============================================================================
+#
+# Copyright (c) 2026, Qualcomm Innovation Center, Inc. All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+#
+#==============================================================================
+
+import os
+import sys
+import time
+import bisect
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds in seconds.
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# Seconds between snapshots a child process ships to the WebUI.
+SHIP_INTERVAL = 1.0
+
+class Metrics(object):
+    """
+    Metrics Class
+
+    Process-local registry of timing histograms and event counters. Recording
+    is a perf_counter() call, a bisect and a short lock, cheap enough for the
+    per-frame hot paths. Child processes send snapshot() to the WebUI, which
+    renders its own registry and the latest snapshot of every child with render().
+    """
+    def __init__(self, buckets = BUCKETS):
+        """
+        Args:
+            buckets: Histogram bucket upper bounds in seconds, ascending.
+        """
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        self.last_ship = 0.0
+        self.reset()
+
+    def reset(self):
+        """
+        Start from empty, e.g. after warm-up runs.
+        """
+        with self.lock:
+            # name -> [bucket counts..., +Inf count, sum]
+            self.histograms = {}
+            self.counters = {}
+
+    def observe(self, name, seconds):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = [0] * (len(self.buckets) + 1) + [0.0]
+            histogram[index] += 1
+            histogram[-1] += seconds
+
+    def inc(self, name, amount = 1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextmanager
+    def time(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "histograms": {name: list(values) for name, values in self.histograms.items()},
+                "counters": dict(self.counters),
+            }
+
+    def ship(self, queue, process, force = False):
+        """
+        Put ("metrics", (process, snapshot)) on `queue` at most every SHIP_INTERVAL seconds.
+        """
+        now = time.time()
+        if not force and now - self.last_ship < SHIP_INTERVAL:
+            return
+        self.last_ship = now
+        queue.put(("metrics", (process, self.snapshot())))
+
+    def summary(self, snapshot = None):
+        """
+        {name: {"count", "mean_ms", "p90_ms"}} of every histogram; p90 is the
+        upper bound of the bucket it falls in.
+        """
+        snapshot = self.snapshot() if snapshot is None else snapshot
+        summary = {}
+        for name, values in snapshot["histograms"].items():
+            counts, total = values[:-1], values[-1]
+            count = sum(counts)
+            if count == 0:
+                continue
+            rank, seen = 0.9 * count, 0
+            for bound, bucket in zip(self.buckets + (float("inf"),), counts):
+                seen += bucket
+                if seen >= rank:
+                    break
+            summary[name] = {"count": count, "mean_ms": round(total / count * 1000.0, 3),
+                             "p90_ms": round(bound * 1000.0, 3) if bound != float("inf") else None}
+        return summary
+
+    def render(self, snapshots, namespace = "robohub"):
+        """
+        Prometheus text exposition of {process: snapshot}.
+        """
+        lines = [f"# HELP {namespace}_stage_seconds Time spent per processing stage.",
+                 f"# TYPE {namespace}_stage_seconds histogram"]
+        for process, snapshot in snapshots.items():
+            for name, values in sorted(snapshot["histograms"].items()):
+                labels = f'process="{process}",stage="{name}"'
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), values[:-1]):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{namespace}_stage_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f"{namespace}_stage_seconds_sum{{{labels}}} {values[-1]!r}")
+                lines.append(f"{namespace}_stage_seconds_count{{{labels}}} {cumulative}")
+        lines += [f"# HELP {namespace}_events_total Counted events, such as dropped frames.",
+                  f"# TYPE {namespace}_events_total counter"]
+        for process, snapshot in snapshots.items():
+            for name, value in sorted(snapshot["counters"].items()):
+                lines.append(f'{namespace}_events_total{{process="{process}",event="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+# The registry of this process.
+METRICS = Metrics()
+
+def sample_stacks(seconds, interval = 0.005):
+    """
+    Sampling profiler: records the stack of every other thread of this process
+    each `interval` seconds for `seconds` seconds. Returns the samples in the
+    collapsed "thread;outer;...;inner count" format flame graph tools read,
+    most frequent first.
+    """
+    own = threading.get_ident()
+    samples = Counter()
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            leaf = True
+            while frame is not None:
+                code = frame.f_code
+                where = f"{os.path.basename(code.co_filename)}:{code.co_name}"
+                stack.append(f"{where}:{frame.f_lineno}" if leaf else where)
+                leaf = False
+                frame = frame.f_back
+            samples[";".join([names.get(ident, str(ident))] + stack[::-1])] += 1
+        time.sleep(interval)
+    return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
@@ -0,0 +1,72 @@
+#==============================================================================
+#
+# Copyright (c) 2026, Qualcomm Innovation Center, Inc. All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+#
+#==============================================================================
+
+import time
+
+import cv2
+
+class MotionGate(object):
+    """
+    MotionGate Class
+
+    Cheap change detector in front of inference. Each candidate frame is
+    shrunk to a small grayscale thumbnail and compared with the thumbnail of
+    the last submitted frame; it passes when enough pixels changed, or when
+    nothing was submitted for `max_staleness` seconds. Comparing against the
+    last submitted frame rather than the previous one lets slow drift add up.
+    """
+    def __init__(self,
+                 threshold: float = 0.01,
+                 max_staleness: float = 30.0,
+                 pixel_delta: int = 25,
+                 size: tuple = (64, 36)):
+        """
+        Args:
+            threshold: Fraction of thumbnail pixels that must change (0 passes every frame).
+            max_staleness: Seconds after which a frame passes regardless of change.
+            pixel_delta: Gray level difference for a thumbnail pixel to count as changed.
+            size: Thumbnail (width, height).
+        """
+        self.threshold = threshold
+        self.max_staleness = max_staleness
+        self.pixel_delta = pixel_delta
+        self.size = size
+        self.reference = None
+        self.last_submit = 0.0
+        self.score = 0.0
+        self.gated = 0
+        self.submitted = 0
+
+    def __call__(self, frame):
+        """
+        True if the BGR `frame` should be submitted; it then becomes the new reference.
+        """
+        small = cv2.cvtColor(cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+        now = time.time()
+        if self.reference is None:
+            self.score = 1.0
+        else:
+            diff = cv2.absdiff(small, self.reference)
+            self.score = cv2.countNonZero(cv2.threshold(diff, self.pixel_delta, 255, cv2.THRESH_BINARY)[1]) / diff.size
+
+        if self.score < self.threshold and now - self.last_submit < self.max_staleness:
+            self.gated += 1
+            return False
+        self.reference = small
+        self.last_submit = now
+        self.submitted += 1
+        return True
+
+    def status(self):
+        return {
+            "threshold": self.threshold,
+            "max_staleness": self.max_staleness,
+            "score": round(self.score, 4),
+            "gated": self.gated,
+            "submitted": self.submitted,
+        }
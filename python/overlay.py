@@ -0,0 +1,77 @@
+#==============================================================================
+#
+# Copyright (c) 2026, Qualcomm Innovation Center, Inc. All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+#
+#==============================================================================
+
+import cv2
+import numpy as np
+
+# BGR colours and line widths of the stream overlay.
+CONTOUR_COLOR, CONTOUR_THICKNESS = (0, 255, 0), 2
+SEGMENT_COLOR, SEGMENT_THICKNESS = (0, 0, 255), 3
+
+class Overlay(object):
+    """
+    Overlay Class
+
+    What the stream loop draws for one result, prepared once by the inference
+    process: the accepted defect contours and the YOLOv8 polylines as int32
+    point arrays, and optionally the whole drawing pre-rendered into a BGRA
+    `tile` covering only their bounding rectangle at `origin`. Drawing costs
+    the same for every streamed frame and does not depend on the mask resolution.
+    """
+    def __init__(self, contours, segments, tile = None, origin = (0, 0)):
+        self.contours = contours
+        self.segments = segments
+        self.tile = tile
+        self.origin = origin
+        self.pixels = None
+
+    @classmethod
+    def build(cls, shape, contours, segments, tile = False):
+        """
+        Args:
+            shape: (height, width) of the frames the overlay is drawn on.
+            contours: Defect contours as returned by cv2.findContours.
+            segments: YOLOv8 segments, (N, 2) float point arrays.
+            tile: Pre-render the drawing into a BGRA tile.
+        """
+        segments = [np.int32(seg).reshape(-1, 1, 2) for seg in segments if len(seg) > 0]
+        overlay = cls(list(contours), segments)
+        points = overlay.contours + overlay.segments
+        if tile and points:
+            # Pad by the line width, so the strokes drawn around the outermost points fit.
+            pad = max(CONTOUR_THICKNESS, SEGMENT_THICKNESS)
+            x, y, w, h = cv2.boundingRect(np.concatenate(points))
+            x1, y1 = max(0, x - pad), max(0, y - pad)
+            x2, y2 = min(shape[1], x + w + pad), min(shape[0], y + h + pad)
+            image = np.zeros((y2 - y1, x2 - x1, 4), dtype=np.uint8)
+            overlay._draw(image, (-x1, -y1), 255)
+            overlay.tile, overlay.origin = image, (x1, y1)
+        return overlay
+
+    def draw(self, frame):
+        """
+        Draw onto a BGR frame in place.
+        """
+        if self.tile is None:
+            self._draw(frame)
+            return
+        if self.pixels is None:
+            # The stroke pixels of the tile, found on the first draw and reused for the following ones.
+            ys, xs = np.nonzero(self.tile[..., 3])
+            self.pixels = (ys + self.origin[1], xs + self.origin[0], self.tile[ys, xs, :3])
+        ys, xs, colors = self.pixels
+        frame[ys, xs] = colors
+
+    def _draw(self, image, offset = (0, 0), alpha = None):
+        contour_color, segment_color = CONTOUR_COLOR, SEGMENT_COLOR
+        if alpha is not None:
+            contour_color, segment_color = contour_color + (alpha,), segment_color + (alpha,)
+        cv2.drawContours(image, self.contours, -1, contour_color, CONTOUR_THICKNESS, offset=offset)
+        if self.segments:
+            segments = self.segments if offset == (0, 0) else [seg + np.int32(offset) for seg in self.segments]
+            cv2.polylines(image, segments, True, segment_color, SEGMENT_THICKNESS)
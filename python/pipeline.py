@@ -0,0 +1,165 @@
+#==============================================================================
+#
+# Copyright (c) 2026, Qualcomm Innovation Center, Inc. All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+#
+#==============================================================================
+
+import time
+import threading
+import traceback
+from collections import deque
+
+class DropQueue(object):
+    """
+    Bounded FIFO between pipeline stages.
+    When full, put() evicts the oldest item and hands it to `on_drop` instead of
+    blocking the producer; with `drop=False` it blocks like a normal queue.
+    """
+    def __init__(self, maxsize = 1, drop = True, on_drop = None):
+        self.maxsize = maxsize
+        self.drop = drop
+        self.on_drop = on_drop
+        self.items = deque()
+        self.cond = threading.Condition()
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        evicted = []
+        with self.cond:
+            if self.drop:
+                while len(self.items) >= self.maxsize:
+                    evicted.append(self.items.popleft())
+                    self.dropped += 1
+            else:
+                self.cond.wait_for(lambda: len(self.items) < self.maxsize or self.closed)
+            self.items.append(item)
+            self.cond.notify_all()
+        if self.on_drop is not None:
+            for old in evicted:
+                self.on_drop(old)
+
+    def get(self):
+        """
+        Next item, or None once the queue is closed and drained.
+        """
+        with self.cond:
+            self.cond.wait_for(lambda: self.items or self.closed)
+            if not self.items:
+                return None
+            item = self.items.popleft()
+            self.cond.notify_all()
+            return item
+
+    def __len__(self):
+        return len(self.items)
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+class Pipeline(object):
+    """
+    Pipeline Class
+
+    Runs each (name, fn) stage on its own thread, connected by bounded DropQueues,
+    so consecutive frames overlap across stages. fn(job) returns the job for the
+    next stage or None to end it early. Since every stage is a single thread
+    reading a FIFO, jobs reach `sink` in submission order; jobs that end early
+    go to `end`, and jobs that fail or are evicted by backpressure go to
+    `discard`, as do jobs the sink raises on, so a sink must not release
+    anything before it can fail. The
+    service time of every stage is tracked as an exponential moving average.
+    """
+    def __init__(self, stages, sink, discard = None, depth = 1, drop = True, alpha = 0.2, end = None):
+        """
+        Args:
+            stages: List of (name, fn) tuples.
+            sink: Called with every job leaving the last stage.
+            discard: Called with every job that fails or is dropped on the way to the sink.
+            depth: Queue length in front of each stage.
+            drop: Evict the oldest queued job when a queue is full instead of blocking.
+            alpha: Weight of the newest sample in the service time averages.
+            end: Called with every job a stage ends early (default: discard).
+        """
+        self.stages = stages
+        self.sink = sink
+        self.discard = discard if discard is not None else (lambda job: None)
+        self.end = end if end is not None else self.discard
+        self.queues = [DropQueue(depth, drop, self.discard) for _ in stages]
+        self.alpha = alpha
+        self.service = [0.0] * len(stages)
+        # Wall-clock start of the job each stage has in hand, None while it waits.
+        self.busy = [None] * len(stages)
+        self.threads = [threading.Thread(target=self._loop, args=(i,), name=f"stage-{name}", daemon=True)
+                        for i, (name, fn) in enumerate(stages)]
+
+    @staticmethod
+    def capacity(stages, depth = 1):
+        """
+        Maximum number of jobs in flight: one running and `depth` queued per stage.
+        """
+        return stages * (depth + 1)
+
+    def start(self):
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, job):
+        self.queues[0].put(job)
+
+    def dropped(self):
+        return {name: queue.dropped for (name, fn), queue in zip(self.stages, self.queues)}
+
+    def latency(self):
+        """
+        Average service time of each stage in seconds.
+        """
+        return {name: service for (name, fn), service in zip(self.stages, self.service)}
+
+    def busy_since(self):
+        """
+        Wall-clock time the oldest job still in a stage or its sink started
+        there, None when every stage waits for work.
+        """
+        return min((since for since in self.busy if since is not None), default=None)
+
+    def stop(self, timeout = None):
+        """
+        Stop accepting jobs and let the queued ones drain through the stages.
+        """
+        self.queues[0].close()
+        for thread in self.threads:
+            thread.join(timeout)
+
+    def _loop(self, index):
+        name, fn = self.stages[index]
+        last = index + 1 == len(self.stages)
+        forward = self.sink if last else self.queues[index + 1].put
+        while True:
+            job = self.queues[index].get()
+            if job is None:
+                break
+            self.busy[index] = time.time()
+            start = time.perf_counter()
+            try:
+                result = fn(job)
+                elapsed = time.perf_counter() - start
+                self.service[index] = elapsed if self.service[index] == 0.0 else \
+                    self.service[index] + self.alpha * (elapsed - self.service[index])
+                if result is not None:
+                    forward(result)
+                else:
+                    self.end(job)
+                continue
+            except Exception:
+                print(f"Pipeline stage '{name}' failed:")
+                traceback.print_exc()
+            finally:
+                self.busy[index] = None
+            self.discard(job)
+        if not last:
+            self.queues[index + 1].close()
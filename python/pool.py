@@ -0,0 +1,529 @@
+#==============================================================================
+#
+# Copyright (c) 2026, Qualcomm Innovation Center, Inc. All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+#
+#==============================================================================
+
+import time
+import queue
+import signal
+import threading
+from collections import deque
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+
+import numpy as np
+
+from sam2 import SAM2
+from inspector import SAM2_MODEL
+from backend import load_model
+from events import EventChannel
+from metrics import METRICS
+
+# Seconds between supervisor checks, and between heartbeats of an idle replica.
+HEARTBEAT_INTERVAL = 0.5
+# Restart delay after the first failure in a row, doubled per further failure up to MAX_BACKOFF.
+RESTART_BACKOFF = 1.0
+MAX_BACKOFF = 30.0
+# A replica that stays up this long is considered healthy again.
+HEALTHY_AFTER = 60.0
+# Smallest shared-memory arena a PoolClient allocates, in bytes.
+ARENA_SIZE = 4 << 20
+
+def _view(buf, offset, shape, dtype = np.uint8):
+    return np.ndarray(shape, dtype=dtype, buffer=buf, offset=offset)
+
+def _segment(sam2, buf, entries, threshold):
+    # Views into the arena stay local, so the mapping can be closed once this returns.
+    crops = [_view(buf, offset, shape, dtype) for offset, shape, dtype, mask_offset in entries]
+    masks = sam2.batch(crops, threshold)
+    for (offset, shape, dtype, mask_offset), mask in zip(entries, masks):
+        _view(buf, mask_offset, shape[:2])[:] = mask
+
+def sam2_replica(index, conn, backend, warmup, heartbeats):
+    """
+    SAM2 replica process body.
+    Loads its own SAM2 context and segments the batches the pool sends over
+    `conn`, one at a time, until it receives None or the pool goes away.
+    Once loaded it stamps heartbeats[index] while idle and before each batch,
+    so the pool tells a hung batch from a quiet replica.
+    A batch is (task_id, arena, entries, threshold): the crops are read from
+    the client's shared-memory `arena` and the masks written back into it,
+    so only ids travel over the pipes. Each batch is answered with
+    ("segmented", (task_id, ok)). Load progress and metrics snapshots travel
+    over `conn` as well.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    name = f"sam2/{index}"
+    events = EventChannel(conn)
+
+    sam2 = load_model(name, lambda: SAM2(SAM2_MODEL, backend=backend), warmup, events)
+    # Warm-up runs are not part of the stage timings.
+    METRICS.reset()
+    arena = None
+    while True:
+        heartbeats[index] = time.time()
+        try:
+            if not conn.poll(HEARTBEAT_INTERVAL):
+                continue
+            task = conn.recv()
+        except (EOFError, OSError):
+            break
+        if task is None:
+            break
+        task_id, arena_name, entries, threshold = task
+        try:
+            if arena is None or arena.name != arena_name:
+                if arena is not None:
+                    arena.close()
+                arena = None
+                arena = shared_memory.SharedMemory(name=arena_name)
+            _segment(sam2, arena.buf, entries, threshold)
+            ok = True
+        except FileNotFoundError:
+            # The client gave up on the batch and unlinked its arena.
+            ok = False
+        # Shipped before the answer, so the replica is reading again by the time the pool sends the next batch.
+        METRICS.ship(events, name)
+        conn.send(("segmented", (task_id, ok)))
+    if arena is not None:
+        arena.close()
+
+class ClientLink(object):
+    """
+    Pool side of the Pipe of one SAM2Pool client. Answers are sent by a thread
+    of their own, so the dispatcher never blocks on a client that is still
+    busy sending the other batches of a frame. Once closed, it unlinks the
+    client's last arena, which a killed client leaves behind.
+    """
+    def __init__(self, conn):
+        self.conn = conn
+        self.arena = None
+        self.outbox = queue.Queue()
+        self.thread = threading.Thread(target=self._send, name="sam2-pool-client", daemon=True)
+        self.thread.start()
+
+    def reply(self, task_id, ok):
+        self.outbox.put((task_id, ok))
+
+    def close(self):
+        self.outbox.put(None)
+
+    def _send(self):
+        while True:
+            reply = self.outbox.get()
+            if reply is None:
+                break
+            try:
+                self.conn.send(reply)
+            except OSError:
+                break
+        self.conn.close()
+        if self.arena is not None:
+            try:
+                arena = shared_memory.SharedMemory(name=self.arena)
+            except FileNotFoundError:
+                # Unlinked by the client itself.
+                return
+            arena.close()
+            arena.unlink()
+
+class SAM2Pool(object):
+    """
+    SAM2Pool Class
+
+    Supervised SAM2 replicas, each a process with its own context. A dispatcher
+    thread owns a Pipe to every replica and one to the client: it queues the
+    batches the client sends, hands each to the next free replica and relays
+    the answer back. Crops and masks stay in the client's shared memory; the
+    dispatcher only moves ids. As it knows which batch every replica has in
+    hand, a replica that exits or whose heartbeat falls behind its load or
+    batch deadline is restarted, with
+    exponential backoff, and its batch is reported to the client as lost, so
+    the client can dispatch it again. A client that dies only takes its own
+    Pipe with it; connect() gives the next one a new Pipe. Created and
+    supervised by the WebUI process.
+    """
+    def __init__(self, replicas = 1, backend = "qnn", event_queue = None, warmup = 1, deadline = 10.0, load_deadline = 120.0):
+        """
+        Args:
+            replicas: Number of SAM2 processes.
+            backend: Inference backend, "qnn" or the "numpy" stand-in.
+            event_queue: Queue the replicas' load progress and metrics snapshots
+                are forwarded to (None drops them).
+            warmup: Inferences each replica runs on dummy inputs after loading.
+            deadline: Seconds a loaded replica may go without a heartbeat, i.e.
+                spend on one batch, before it is killed and restarted.
+            load_deadline: Seconds a replica may take to start, load and warm up
+                its context before it is killed and restarted.
+        """
+        self.replicas = replicas
+        self.backend = backend
+        self.event_queue = event_queue
+        self.warmup = warmup
+        self.deadline = deadline
+        self.load_deadline = load_deadline
+
+        self.processes = [None] * replicas
+        self.conns = [None] * replicas
+        self.loaded = [False] * replicas
+        # (task, client) of the batch each replica has in hand.
+        self.inflight = [None] * replicas
+        self.processed = [0] * replicas
+        self.started = [0.0] * replicas
+        # Last sign of life of each replica, written by the replica once loaded.
+        self.heartbeats = mp.RawArray('d', replicas)
+        self.restarts = [0] * replicas
+        self.failures = [0] * replicas
+        self.restart_at = [0.0] * replicas
+        self.rates = [0.0] * replicas
+        self.last_processed = [0] * replicas
+        self.last_error = [None] * replicas
+        self.client = None
+        self.pending = deque()
+        self.lost = 0
+        # Guards the state above; never held across pipe I/O, process starts or joins.
+        self.lock = threading.Lock()
+        self.running = False
+        self.thread = None
+
+    def names(self):
+        return [f"sam2/{index}" for index in range(self.replicas)]
+
+    def start(self):
+        self.running = True
+        for index in range(self.replicas):
+            self._spawn(index)
+        self.thread = threading.Thread(target=self._run, name="sam2-pool", daemon=True)
+        self.thread.start()
+
+    def connect(self):
+        """
+        New Pipe for a client process, such as a (re)started inference process.
+        Returns the client's end, for a PoolClient in that process. The previous
+        client is disconnected and its queued batches are dropped.
+        """
+        ours, theirs = mp.Pipe()
+        with self.lock:
+            self._disconnect()
+            self.client = ClientLink(ours)
+        return theirs
+
+    def _disconnect(self):
+        # Caller holds self.lock. Answers to the client's batches still in a replica are dropped when they come.
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+        self.pending.clear()
+
+    def _spawn(self, index):
+        ours, theirs = mp.Pipe()
+        process = mp.Process(target=sam2_replica, name=f"sam2-{index}", daemon=True,
+                             args=(index, theirs, self.backend, self.warmup, self.heartbeats))
+        # Loading is measured from here; the replica takes over once loaded.
+        self.heartbeats[index] = time.time()
+        process.start()
+        # Only the replica keeps its end, so either side sees the other one go away.
+        theirs.close()
+        with self.lock:
+            self.processes[index] = process
+            self.conns[index] = ours
+            self.loaded[index] = False
+            self.inflight[index] = None
+            self.started[index] = time.time()
+
+    def _run(self):
+        last = time.time()
+        while self.running:
+            with self.lock:
+                client = self.client
+                conns = {conn: index for index, conn in enumerate(self.conns) if conn is not None}
+            ready = wait(list(conns) + ([client.conn] if client is not None else []), timeout=HEARTBEAT_INTERVAL)
+            if not self.running:
+                break
+            # The dispatcher is the only reader of every pipe, so it reads them without the lock.
+            for conn in ready:
+                if client is not None and conn is client.conn:
+                    self._receive_task(client)
+                else:
+                    self._receive(conns[conn], conn)
+            now = time.time()
+            if now - last >= HEARTBEAT_INTERVAL:
+                self._supervise(now, now - last)
+                last = now
+            self._dispatch()
+
+    def _receive_task(self, client):
+        try:
+            task = client.conn.recv()
+        except (EOFError, OSError):
+            task = None
+        with self.lock:
+            if client is not self.client:
+                return
+            if task is None:
+                # The client died; its batches go with it.
+                self._disconnect()
+                return
+            client.arena = task[1]
+            self.pending.append((task, client))
+
+    def _receive(self, index, conn):
+        try:
+            kind, data = conn.recv()
+        except (EOFError, OSError):
+            with self.lock:
+                process = self.processes[index] if self.conns[index] is conn else None
+            if process is None:
+                return
+            # A replica closes its pipe by exiting, which takes a moment to show.
+            process.join(timeout=1.0)
+            self._failed(index, conn, f"exited with code {process.exitcode}" if process.exitcode is not None else "closed its pipe")
+            return
+        if kind == "segmented":
+            with self.lock:
+                if self.conns[index] is not conn or self.inflight[index] is None:
+                    return
+                task, client = self.inflight[index]
+                self.inflight[index] = None
+                self.processed[index] += 1
+                current = client is self.client
+            if current:
+                client.reply(*data)
+            else:
+                METRICS.inc("sam2_stale_replies")
+            return
+        # Anything else is an event of the replica; the "ready" one of load_model() makes it take batches.
+        if kind == "model" and data[1]["state"] == "ready":
+            with self.lock:
+                if self.conns[index] is conn:
+                    self.loaded[index] = True
+                    # From now on the batch deadline applies, counted from the end of loading.
+                    self.heartbeats[index] = time.time()
+        if self.event_queue is not None:
+            self.event_queue.put((kind, data))
+
+    def _dispatch(self):
+        sends = []
+        with self.lock:
+            for index, conn in enumerate(self.conns):
+                if not self.pending:
+                    break
+                if conn is None or not self.loaded[index] or self.inflight[index] is not None:
+                    continue
+                task, client = self.pending.popleft()
+                self.inflight[index] = (task, client)
+                sends.append((index, conn, task))
+        for index, conn, task in sends:
+            try:
+                conn.send(task)
+            except OSError:
+                # Reported as lost with the replica, so the client dispatches the batch again.
+                self._failed(index, conn, "closed its pipe")
+
+    def _supervise(self, now, elapsed):
+        failed, due = [], []
+        with self.lock:
+            for index, process in enumerate(self.processes):
+                if process is None:
+                    if now >= self.restart_at[index]:
+                        self.restarts[index] += 1
+                        due.append(index)
+                    continue
+                loaded = self.loaded[index]
+                deadline = self.deadline if loaded else self.load_deadline
+                if not process.is_alive():
+                    failed.append((index, self.conns[index], f"exited with code {process.exitcode}"))
+                elif now - self.heartbeats[index] > deadline:
+                    failed.append((index, self.conns[index], f"missed its {deadline:g} s {'batch' if loaded else 'load'} deadline"))
+                else:
+                    count = self.processed[index]
+                    rate = (count - self.last_processed[index]) / max(elapsed, 1e-6)
+                    self.rates[index] = 0.8 * self.rates[index] + 0.2 * rate
+                    self.last_processed[index] = count
+        for index, conn, reason in failed:
+            self._failed(index, conn, reason)
+        for index in due:
+            self._spawn(index)
+
+    def _failed(self, index, conn, reason):
+        """
+        Take down replica `index` if it still runs behind `conn`, report its batch
+        as lost and schedule its restart.
+        """
+        now = time.time()
+        with self.lock:
+            if self.conns[index] is not conn:
+                # Already taken down by another path.
+                return
+            process = self.processes[index]
+            lost = self.inflight[index]
+            if lost is not None:
+                self.lost += 1
+            if now - self.started[index] >= HEALTHY_AFTER:
+                self.failures[index] = 0
+            self.failures[index] += 1
+            self.restart_at[index] = now + min(MAX_BACKOFF, RESTART_BACKOFF * 2 ** (self.failures[index] - 1))
+            self.last_error[index] = reason
+            self.processes[index] = None
+            self.conns[index] = None
+            self.loaded[index] = False
+            self.inflight[index] = None
+            self.rates[index] = 0.0
+            current = lost is not None and lost[1] is self.client
+        print(f"SAM2 replica {index} {reason}, restarting")
+        METRICS.inc("sam2_replica_failures")
+        if current:
+            # The batch died with the replica; its client decides to dispatch it again or drop the frame.
+            lost[1].reply(lost[0][0], False)
+        if process.is_alive():
+            process.kill()
+        process.join(timeout=1.0)
+        conn.close()
+        if self.event_queue is not None:
+            self.event_queue.put(("model", (f"sam2/{index}", {"state": "failed", "error": reason})))
+
+    def status(self):
+        now = time.time()
+        with self.lock:
+            replicas = []
+            for index, process in enumerate(self.processes):
+                alive = process is not None and process.is_alive()
+                replicas.append({
+                    "alive": alive,
+                    "loaded": alive and self.loaded[index],
+                    "busy": alive and self.inflight[index] is not None,
+                    "processed": self.processed[index],
+                    "heartbeat_age": round(now - self.heartbeats[index], 1) if alive else None,
+                    "fps": round(self.rates[index], 2),
+                    "restarts": self.restarts[index],
+                    "restart_in": round(max(0.0, self.restart_at[index] - now), 1) if process is None else None,
+                    "last_error": self.last_error[index],
+                })
+            return {
+                "size": self.replicas,
+                "alive": sum(1 for replica in replicas if replica["alive"]),
+                "restarts": sum(self.restarts),
+                "lost": self.lost,
+                "queued": len(self.pending),
+                "replicas": replicas,
+            }
+
+    def stop(self, timeout = 2.0):
+        self.running = False
+        if self.thread is not None and self.thread.is_alive():
+            self.thread.join(timeout=timeout)
+        with self.lock:
+            self._disconnect()
+            live = [(process, conn) for process, conn in zip(self.processes, self.conns) if process is not None and process.is_alive()]
+        for process, conn in live:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+        for process, conn in live:
+            process.join(timeout=timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+class PoolClient(object):
+    """
+    Client side of a SAM2Pool connection with the same batch() interface as SAM2.
+    The crops of a batch are split into one batch per replica, so the replicas
+    segment them in parallel, each through its batched SAM2 path. Crops and
+    masks are exchanged through a shared-memory arena the client owns; only
+    ids and offsets go over the pipe. Meant to be called from one thread at a time.
+    """
+    def __init__(self, conn, replicas = 1, timeout = 30.0, retries = 1):
+        """
+        Args:
+            conn: The client's end of SAM2Pool.connect().
+            replicas: Number of replicas of the pool, i.e. batches a call is split into.
+            timeout: Seconds to wait for a batch before raising TimeoutError.
+            retries: Times a batch lost with a failed replica is dispatched again
+                before the call fails, so the frame is dropped.
+        """
+        self.conn = conn
+        self.replicas = replicas
+        self.timeout = timeout
+        self.retries = retries
+        self.number = 0
+        self.arena = None
+
+    def __call__(self, frame, threshold = 0.8):
+        return self.batch([frame], threshold)[0]
+
+    def _reserve(self, size):
+        if self.arena is not None and self.arena.size >= size:
+            return self.arena
+        previous = self.arena.size if self.arena is not None else 0
+        self.close()
+        self.arena = shared_memory.SharedMemory(create=True, size=max(size, ARENA_SIZE, 2 * previous))
+        return self.arena
+
+    def batch(self, frames, threshold = 0.8):
+        if len(frames) == 0:
+            return []
+
+        crops = [np.ascontiguousarray(frame) for frame in frames]
+        # Every crop and its mask get a 64-byte aligned place in the arena.
+        entries, size = [], 0
+        for crop in crops:
+            mask_offset = size + (crop.nbytes + 63) // 64 * 64
+            entries.append((size, crop.shape, crop.dtype.str, mask_offset))
+            size = mask_offset + (crop.shape[0] * crop.shape[1] + 63) // 64 * 64
+        arena = self._reserve(size)
+        for (offset, shape, dtype, mask_offset), crop in zip(entries, crops):
+            _view(arena.buf, offset, shape, dtype)[:] = crop
+
+        tasks = {}
+        for items in np.array_split(np.arange(len(crops)), min(self.replicas, len(crops))):
+            self.number += 1
+            tasks[self.number] = (self.number, arena.name, [entries[item] for item in items], threshold)
+        deadline = time.time() + self.timeout
+        attempts = dict.fromkeys(tasks, 0)
+        with METRICS.time("sam2_call"):
+            try:
+                for task in tasks.values():
+                    self.conn.send(task)
+                remaining = set(tasks)
+                while remaining:
+                    if not self.conn.poll(max(0.0, deadline - time.time())):
+                        METRICS.inc("sam2_timeouts")
+                        raise TimeoutError(f"SAM2 pool did not answer within {self.timeout} s")
+                    task_id, ok = self.conn.recv()
+                    # Answers to batches that already timed out are stale.
+                    if task_id not in remaining:
+                        METRICS.inc("sam2_stale_replies")
+                        continue
+                    if not ok:
+                        attempts[task_id] += 1
+                        if attempts[task_id] > self.retries:
+                            METRICS.inc("sam2_dropped")
+                            raise RuntimeError(f"SAM2 batch lost {attempts[task_id]} times, dropping the frame")
+                        METRICS.inc("sam2_redispatched")
+                        self.conn.send(tasks[task_id])
+                        continue
+                    remaining.discard(task_id)
+            except (TimeoutError, RuntimeError):
+                # Replicas may still write into this arena; the next call gets a fresh one.
+                self.close()
+                raise
+            return [_view(arena.buf, mask_offset, shape[:2]).copy() for offset, shape, dtype, mask_offset in entries]
+
+    def close(self):
+        """
+        Unlink the arena; the next batch allocates a new one.
+        """
+        if self.arena is None:
+            return
+        try:
+            self.arena.close()
+        except BufferError:
+            pass
+        self.arena.unlink()
+        self.arena = None
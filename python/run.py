@@ -8,75 +8,193 @@
 
 import os
 import sys
-import cv2
 import time
 import queue
 import signal
 import argparse
+import threading
 from datetime import datetime
 import multiprocessing as mp
 
-import numpy as np
-from flask import Flask, render_template, request, send_from_directory, Response, jsonify
+from flask import Flask, render_template, request, send_from_directory, Response, jsonify, abort
+from werkzeug.security import safe_join
 
 from yolov8 import Yolov8Seg
-from sam2 import SAM2
-from utils import draw_detect_res
+from backend import BACKENDS, load_model
+from inspector import Inspector, FrameJob, YOLOV8_MODEL
+from pipeline import Pipeline
+from pool import SAM2Pool, PoolClient, HEARTBEAT_INTERVAL, RESTART_BACKOFF, MAX_BACKOFF, HEALTHY_AFTER
+from sharedring import RingSync, select, READING, WRITING
+from camera import Camera
+from capture import CAPTURE_BACKENDS
+from overlay import Overlay
+from writer import ENCODERS, ResultWriter, WriterStats
+from catalogue import Catalogue
+from events import EventBus, EventChannel
+from tracker import Tracker
+from metrics import METRICS, sample_stacks
+from scheduler import SCHEDULER_MODES, StageStats
+
+# Jobs queued in front of each inference pipeline stage.
+PIPELINE_DEPTH = 1
+# Longest sampled trace /profile takes, in seconds.
+MAX_PROFILE_SECONDS = 30.0
 
 class WebUI(object):
     """
     WebUI Class
     
     Wraps the Flask application, AI models (YOLOv8 + SAM2), and video processing logic.
-    Implements a producer-consumer pattern using queues for real-time inference.
+    Implements a producer-consumer pattern over shared-memory rings for real-time inference.
+    Every camera has its own capture loop, streams and result namespace, while one
+    inference process with one set of models serves all of them round-robin.
     """
     def __init__(self, 
-                 source: str, 
-                 resolution: list, 
+                 sources: list, 
+                 resolutions: list, 
                  save_dir: str,
-                 target_class_id: int = 0):
+                 class_ids: list = None,
+                 backend: str = "qnn",
+                 streams: list = None,
+                 save_format: str = "jpg",
+                 save_quality: int = None,
+                 sidecar: bool = False,
+                 motion_threshold: float = 0.01,
+                 max_staleness: float = 30.0,
+                 track: bool = True,
+                 scheduler: str = "fixed",
+                 duty_cycle: float = 0.8,
+                 min_rate: float = 0.2,
+                 max_rate: float = 10.0,
+                 overlay_tile: bool = False,
+                 capture_backend: str = "auto",
+                 gst_decoder: str = "jpegdec",
+                 warmup: int = 1,
+                 lazy_load: bool = False,
+                 all_classes: bool = False,
+                 sam2_replicas: int = 1,
+                 sam2_deadline: float = 10.0,
+                 load_deadline: float = 120.0,
+                 inference_deadline: float = 60.0):
         """
         Args:
-            source: Camera ID (int) or Video Path (str).
-            resolution: Tuple of (width, height).
-            save_dir: Directory to save results.
-            target_class_id: Class ID to filter (default 0).
+            sources: Camera IDs (int), Video Paths (str) or GStreamer pipelines, one per camera.
+            resolutions: (width, height) per camera; the last one is reused for the remaining cameras.
+            save_dir: Directory to save results; with several cameras each saves to its own subdirectory.
+            class_ids: Class ID to filter per camera; the last one is reused for the remaining cameras (default [0]).
+            backend: Inference backend, "qnn" or the "numpy" stand-in (default "qnn").
+            streams: MJPEG stream specs as "name:quality[:width]" (default camera.DEFAULT_STREAMS).
+            save_format: Result image format, one of writer.ENCODERS (default "jpg").
+            save_quality: Encoder quality, None for the OpenCV default.
+            sidecar: Write a JSON sidecar with boxes and RLE defect masks next to each result.
+            motion_threshold: Fraction of changed pixels needed to run inference on a frame (0 disables gating).
+            max_staleness: Seconds after which a frame is inferred even if nothing changed.
+            track: Track objects to reuse SAM2 masks and save each object once (default True).
+            scheduler: "fixed" infers every inference_interval seconds, "adaptive" as fast as the
+                pipeline absorbs frames within duty_cycle, min_rate and max_rate (default "fixed").
+            duty_cycle: Fraction of time the slowest stage may be busy in adaptive mode.
+            min_rate: Lowest inference rate in frames per second in adaptive mode.
+            max_rate: Highest inference rate in frames per second in adaptive mode.
+            overlay_tile: Pre-render each result's overlay into a BGRA tile the stream loop
+                only copies, instead of drawing its contours and polylines per frame.
+            capture_backend: How cameras are opened, one of capture.CAPTURE_BACKENDS (default "auto").
+            gst_decoder: JPEG decoder element of the GStreamer camera pipeline (default "jpegdec").
+            warmup: Inferences each model runs on dummy inputs after loading (default 1).
+            lazy_load: Serve the UI and streams right away while the models load in the
+                background, instead of waiting for them in run().
+            all_classes: Decode and draw the boxes of every class, not only each camera's class_id.
+            sam2_replicas: SAM2 processes segmenting crops in parallel (default 1).
+            sam2_deadline: Seconds a SAM2 replica may spend on one batch of crops before it is restarted.
+            load_deadline: Seconds a model process may take to load and warm up its context before it is restarted.
+            inference_deadline: Seconds a frame may stay in the inference pipeline before the
+                inference process is considered hung and restarted; above the SAM2 client timeout.
         """
         self.app = Flask(__name__)
 
-        try:
-            video_source = int(source)
-        except ValueError:
-            video_source = source
-
-        self.width, self.height = resolution
-        self.cap = cv2.VideoCapture(video_source)
-        self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
-        # self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'YUYV'))
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
-
-
-        self.input_queue = mp.Queue(maxsize=1)
-        self.result_queue = mp.Queue(maxsize=1)
-
         self.is_active = mp.Value('b', False) 
         self.inference_interval = mp.Value('d', 4.0)
-        self.target_class_id = target_class_id
+        self.stage_stats = StageStats(Inspector.STAGES)
+        self.backend = backend
+        self.track = track
+        self.overlay_tile = overlay_tile
+        self.warmup = warmup
+        self.lazy_load = lazy_load
+        self.all_classes = all_classes
+
+        # Load progress of the models, reported by the processes that own them.
+        # Cameras dispatch no frames until YOLOv8 and at least one SAM2 replica are ready.
+        self.models = {}
+        self.models_ready = threading.Event()
+        self.load_start = time.time()
+        self.load_time = None
 
         self.save_dir = os.path.normpath(os.path.abspath(save_dir)) if save_dir else os.path.join(os.path.dirname(os.path.abspath(__file__)), 'result')
         print("Saving Results to:", self.save_dir)
         os.makedirs(self.save_dir, exist_ok=True)
-        
-        self.p = mp.Process(target=self.inference_worker, args=(
-            self.input_queue,
-            self.result_queue,
-            self.is_active,
-            self.inference_interval,
-            self.save_dir
-        ))
-        self.p.daemon = True
-        self.p.start()
+        self.save_options = {"format": save_format, "quality": save_quality, "sidecar": sidecar}
+        self.writer_stats = WriterStats()
+
+        # Frames and masks travel through shared memory instead of pickled queues.
+        # An input ring holds every frame in flight in the pipeline plus one pending and one being written.
+        input_slots = Pipeline.capacity(len(Inspector.STAGES), PIPELINE_DEPTH) + 2
+        # The input rings share one RingSync, so the inference process can wait on all of them at once.
+        self.ring_sync = ring_sync = RingSync()
+        class_ids = class_ids or [0]
+        self.cameras = []
+        for index, source in enumerate(sources):
+            name = f"cam{index}"
+            self.cameras.append(Camera(
+                name, source,
+                resolutions[min(index, len(resolutions) - 1)],
+                class_ids[min(index, len(class_ids) - 1)],
+                # A single camera keeps saving to the top of save_dir, as before.
+                os.path.join(self.save_dir, name) if len(sources) > 1 else self.save_dir,
+                self.is_active, self.inference_interval, self.stage_stats, input_slots,
+                ring_sync=ring_sync,
+                # In adaptive mode each camera gets an equal share of the pipeline.
+                share=1.0 / len(sources),
+                streams=streams,
+                motion_options={"threshold": motion_threshold, "max_staleness": max_staleness},
+                scheduler_options={"mode": scheduler, "duty_cycle": duty_cycle, "min_rate": min_rate, "max_rate": max_rate},
+                overlay_tile=overlay_tile,
+                capture_backend=capture_backend,
+                gst_decoder=gst_decoder,
+                ready=self.models_ready))
+            os.makedirs(self.cameras[-1].save_dir, exist_ok=True)
+        self.camera_index = {camera.name: camera for camera in self.cameras}
+
+        # Events from the child processes, forwarded to the /events clients by event_pump.
+        self.event_queue = queue.Queue()
+        self.event_bus = EventBus()
+        # Latest metrics snapshot of every child process, and sampled traces they answer /profile with.
+        self.remote_metrics = {}
+        self.profiles = queue.Queue()
+        self.profile_lock = threading.Lock()
+
+        # SAM2 runs in its own processes so its contexts overlap with YOLOv8 instead of
+        # queueing behind it on the GIL of the inference process.
+        self.sam2_pool = SAM2Pool(sam2_replicas, self.backend, self.event_queue, self.warmup, sam2_deadline, load_deadline)
+        self.models = {name: {"state": "pending"} for name in ["yolov8"] + self.sam2_pool.names()}
+        self.sam2_pool.start()
+
+        # Restarted by supervise() when it dies or its heartbeat falls behind.
+        self.inference_restarts = 0
+        self.load_deadline = load_deadline
+        self.inference_deadline = inference_deadline
+        self.heartbeat = mp.RawValue('d')
+        self.start_inference()
+
+        # The WebUI's own connection; the inference process opens another one.
+        self.catalogue = Catalogue(self.save_dir)
+        self.catalogue.rebuild()
+
+        self.running = True
+        for camera in self.cameras:
+            camera.start()
+        self.event_thread = threading.Thread(target=self.event_pump, name="events", daemon=True)
+        self.event_thread.start()
+        self.supervisor = threading.Thread(target=self.supervise, name="supervisor", daemon=True)
+        self.supervisor.start()
 
         self._register_routes()
 
@@ -87,12 +205,20 @@ class WebUI(object):
         """Internal method to register Flask routes."""
         self.app.route('/')(self.index)
         self.app.route('/video_feed')(self.video_feed)
+        self.app.route('/video_feed/<camera>')(self.video_feed)
+        self.app.route('/events')(self.events)
         self.app.route('/start_patrol', methods=['POST'])(self.start_patrol)
         self.app.route('/end_patrol', methods=['POST'])(self.end_patrol)
         self.app.route('/set_det_step', methods=['POST'])(self.set_interval)
+        self.app.route('/set_motion', methods=['POST'])(self.set_motion)
+        self.app.route('/set_scheduler', methods=['POST'])(self.set_scheduler)
         self.app.route('/get_status')(self.get_status)
+        self.app.route('/ready')(self.ready)
         self.app.route('/get_result')(self.get_result)
-        self.app.route('/result_files/<filename>')(self.serve_result_file)
+        self.app.route('/metrics')(self.metrics)
+        self.app.route('/profile')(self.profile)
+        self.app.route('/result_files/<path:filename>')(self.serve_result_file)
+        self.app.route('/result_thumbs/<path:filename>')(self.serve_result_thumb)
 
     def index(self):
         """
@@ -100,114 +226,287 @@ class WebUI(object):
         """
         return render_template('index.html')
 
-    def inference_worker(self, input_queue, result_queue, is_active_val, interval_val, save_dir):
+    def start_inference(self):
+        sam2_conn = self.sam2_pool.connect()
+        # A Pipe per process: one that dies mid-message takes only its own Pipe with it.
+        conn, child_conn = mp.Pipe()
+        self.p = mp.Process(target=self.inference_worker, args=(
+            [camera.endpoint() for camera in self.cameras],
+            sam2_conn,
+            self.save_dir,
+            self.writer_stats,
+            child_conn,
+            self.stage_stats,
+            self.heartbeat,
+            {
+                "backend": self.backend,
+                "warmup": self.warmup,
+                "track": self.track,
+                "all_classes": self.all_classes,
+                "overlay_tile": self.overlay_tile,
+                "save_options": self.save_options,
+                "sam2_replicas": self.sam2_pool.replicas,
+            }
+        ))
+        self.p.daemon = True
+        # Loading is measured from here; the process takes over once its pipeline runs.
+        self.heartbeat.value = time.time()
+        self.p.start()
+        # The pool and forward_events() see the process go away once it holds the only other ends.
+        sam2_conn.close()
+        child_conn.close()
+        self.inference_conn = conn
+        threading.Thread(target=self.forward_events, args=(conn,), name="inference-events", daemon=True).start()
+        self.p_started = time.time()
+
+    def forward_events(self, conn):
         """
-        Background worker thread.
-        Consumes frames from input_queue, runs inference, and puts masks into result_queue.
+        Put the events of one inference process on event_queue until it exits.
         """
-        signal.signal(signal.SIGINT, signal.SIG_IGN)
-
-        yolov8 = Yolov8Seg(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../resources/cutoff_yolov8s-seg_qcs8550_w8a16.qnn236.ctx.bin"), 640, 640, 1)
-        sam2 = SAM2(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../resources/sam2unet_large_fix_w8a16.qnn231.ctx.bin"))
-
         while True:
             try:
-                frame, timestamp = input_queue.get(timeout=1.0)
-                if frame is None:
-                    break
-            except queue.Empty:
-                continue
-
-            boxes, segments = yolov8(frame)
-            if boxes is None:
-                continue
-
-            masks = np.zeros(frame.shape[:2], dtype=np.uint8)
-            detect_flag = False
-
-            for i in range(len(boxes)):
-                cls_id = int(boxes[i][5]) 
-                if cls_id == self.target_class_id:
-                    x1, y1, x2, y2 = [int(t) for t in boxes[i][:4]]
-                    x1, y1 = max(0, x1), max(0, y1)
-                    x2, y2 = min(self.width, x2), min(self.height, y2)
+                event = conn.recv()
+            except (EOFError, OSError):
+                break
+            self.event_queue.put(event)
+        conn.close()
 
-                    if (x2 - x1) * (y2 - y1) < 10000:
+    def supervise(self):
+        """
+        Restart the inference process when it dies, with the backoff of the SAM2 pool.
+        One whose heartbeat is older than load_deadline while YOLOv8 loads, or
+        inference_deadline after, is hung and killed first. Before the restart, the ring locks it may have died holding are renewed
+        and the ring slots it held are freed.
+        """
+        failures, restart_at = 0, None
+        while self.running:
+            time.sleep(HEARTBEAT_INTERVAL)
+            now = time.time()
+            if not self.running:
+                break
+            if restart_at is None:
+                if self.p.is_alive():
+                    loaded = self.models["yolov8"]["state"] == "ready"
+                    deadline = self.inference_deadline if loaded else self.load_deadline
+                    if now - self.heartbeat.value <= deadline:
                         continue
+                    reason = f"missed its {deadline:g} s {'inference' if loaded else 'load'} deadline"
+                    self.p.kill()
+                    self.p.join(timeout=1.0)
+                else:
+                    reason = f"exited with code {self.p.exitcode}"
+                print(f"Inference process {reason}, restarting")
+                METRICS.inc("inference_failures")
+                self.models["yolov8"] = {"state": "failed", "error": reason}
+                self._update_ready()
+                # First, as a camera loop may already wait for a lock it died holding.
+                self.ring_sync.renew()
+                # Frames in its pipeline and results it was writing are lost.
+                for camera in self.cameras:
+                    camera.result_ring.sync.renew()
+                    camera.input_ring.reclaim(READING)
+                    camera.result_ring.reclaim(WRITING)
+                if now - self.p_started >= HEALTHY_AFTER:
+                    failures = 0
+                failures += 1
+                restart_at = now + min(MAX_BACKOFF, RESTART_BACKOFF * 2 ** (failures - 1))
+            elif now >= restart_at:
+                self.inference_restarts += 1
+                self.start_inference()
+                restart_at = None
+
+    @staticmethod
+    def inference_worker(cameras, sam2_conn, save_dir, writer_stats, conn, stage_stats, heartbeat, options):
+        """
+        Background worker process.
+        Takes frames from the input rings of all cameras in round-robin order and
+        runs them through the detect, prepare, segment and compose stages as one
+        pipeline, so frame N+1's YOLOv8 overlaps frame N's SAM2 whichever camera
+        they come from. Each camera has its own Inspector (class filter, tracker
+        and ResultWriter); the Overlay of each frame with a segmented target roi
+        is published into the camera's result_ring in frame order, while defect frames are saved in the background and announced
+        on `conn`, together with metrics snapshots and the sampled traces
+        asked for on it. The main loop stamps `heartbeat` with the start of the
+        oldest job still in the pipeline, or the current time when it is idle,
+        so a stage stuck on one frame shows up. Started from the fork server, so it gets only its
+        arguments: the CameraEndpoints and the backend, warmup, track,
+        all_classes, overlay_tile, save_options and sam2_replicas settings in `options`.
+        """
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        event_queue = EventChannel(conn)
 
-                    if len(segments[i]) > 0:
-                        mask_temp = np.zeros((self.height, self.width), dtype=np.uint8)
-                        poly = np.int32([segments[i]])
-                        cv2.fillPoly(mask_temp, poly, 255)
-
-                        masked_frame = cv2.bitwise_and(frame, frame, mask=mask_temp)
-                        crop_img = masked_frame[y1:y2, x1:x2]
-
-                        new_mask = sam2(crop_img)
-                        masks[y1:y2, x1:x2] = masks[y1:y2, x1:x2] + new_mask
-                        detect_flag = True
-
-            if detect_flag:
-                masks = np.where(masks > 0, 255, 0).astype(np.uint8)
-                contours, _ = cv2.findContours(masks[:,:], cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                
-                if contours:
-                    valid_contours = [c for c in contours if (cv2.contourArea(c) > 10 and cv2.contourArea(c) < 100000)]
-                    if valid_contours:      
-                        cv2.drawContours(frame, valid_contours, -1, (0, 255, 0), 3)
-                        for seg in segments:
-                            cv2.polylines(frame, np.int32([seg]), True, (255, 0, 0), 3)
-                        save_path = os.path.join(save_dir, timestamp.strftime("%Y_%m_%d_%H_%M_%S_%f")[:-3] + ".jpg")
-                        cv2.imwrite(save_path, cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
-                result_queue.put((masks, segments))
-
-    def generate_frames(self):
-        """
-        Generator function for video streaming.
-        Captures video, manages queue I/O, overlays masks, and yields MJPEG frames.
-        """
-
-        latest_mask = None
-        hold_count = 10
-        last_time = time.time()
-        while True:
-            success, frame = self.cap.read()
-            if not success:
-                break
-            
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            if self.is_active.value and (time.time() - last_time >= self.inference_interval.value):
+        def profiler():
+            while True:
                 try:
-                    last_time = time.time()
-                    self.input_queue.put_nowait((frame, datetime.now()))
-                except mp.queues.Full:
-                    pass
+                    seconds = conn.recv()
+                except (EOFError, OSError):
+                    break
+                if seconds is None:
+                    break
+                event_queue.put(("profile", sample_stacks(seconds)))
+        threading.Thread(target=profiler, name="profiler", daemon=True).start()
+
+        # One set of model contexts for every camera. The SAM2 replicas load meanwhile.
+        yolov8 = load_model("yolov8", lambda: Yolov8Seg(YOLOV8_MODEL, 640, 640, 1, backend=options["backend"]), options["warmup"], event_queue)
+        # Warm-up runs are not part of the stage timings.
+        METRICS.reset()
+        sam2 = PoolClient(sam2_conn, options["sam2_replicas"])
+        catalogue = Catalogue(save_dir)
+
+        def saved_to(camera):
+            # Results of a camera saving to a subdirectory are indexed as "<camera>/<file>".
+            prefix = os.path.relpath(camera.save_dir, save_dir)
+            def saved(filename, timestamp):
+                row = catalogue.add(filename if prefix == os.curdir else f"{prefix}/{filename}", timestamp)
+                if row is not None:
+                    event_queue.put(("result", row))
+            return saved
+
+        writers, inspectors = [], []
+        for camera in cameras:
+            writer = ResultWriter(camera.save_dir, stats=writer_stats, on_saved=saved_to(camera), **options["save_options"])
+            tracker = Tracker() if options["track"] else None
+            writers.append(writer)
+            # Only the camera's own class is decoded, unless every class is to be drawn.
+            classes = None if options["all_classes"] else [camera.target_class_id]
+            inspectors.append(Inspector(yolov8, sam2, writer=writer, target_class_id=camera.target_class_id, tracker=tracker, classes=classes))
+
+        def publish(job):
+            camera = cameras[job.camera]
+            # As before the pipeline, only frames with a segmented target roi replace the overlay.
+            # If this fails, e.g. an overlay too big for its slot, the pipeline discards the job,
+            # which releases the slot instead: it must be released exactly once.
+            if job.rois:
+                with METRICS.time("overlay_build"):
+                    overlay = Overlay.build(job.frame.shape[:2], job.contours, job.segments, options["overlay_tile"])
+                camera.result_ring.put(None, job.timestamp, overlay, overwrite=True)
+            camera.input_ring.release(job.slot)
+            latency = (datetime.now() - job.timestamp).total_seconds()
+            camera.stats.processed(latency)
+            METRICS.observe("frame_latency", latency)
+            for stage, seconds in job.timings.items():
+                METRICS.observe(f"stage_{stage}", seconds)
+            stage_stats.update(pipeline)
+            METRICS.ship(event_queue, "inference")
+
+        def discard(job):
+            camera = cameras[job.camera]
+            camera.input_ring.release(job.slot)
+            camera.stats.discarded()
+            METRICS.inc("frames_discarded")
+            stage_stats.update(pipeline)
+
+        def no_target(job):
+            # No detections or no target roi: inferred in full, just nothing to show.
+            camera = cameras[job.camera]
+            camera.input_ring.release(job.slot)
+            camera.stats.no_target()
+            METRICS.inc("frames_no_target")
+            stage_stats.update(pipeline)
+
+        # Every stage runs the Inspector of the camera the job came from.
+        stages = [(name, lambda job, name=name: getattr(inspectors[job.camera], name)(job)) for name in Inspector.STAGES]
+        pipeline = Pipeline(stages, publish, discard, depth=PIPELINE_DEPTH, end=no_target)
+        pipeline.start()
+
+        rings = [camera.input_ring for camera in cameras]
+        turn = 0
+        expired = time.time()
+        while True:
+            taken = select(rings, turn, timeout=1.0)
+            heartbeat.value = pipeline.busy_since() or time.time()
+            # Idle tracks are saved every second, also while frames keep coming without detections.
+            if time.time() - expired >= 1.0:
+                expired = time.time()
+                for inspector in inspectors:
+                    inspector.expire()
+            if taken is None:
+                if all(ring.closed.value for ring in rings):
+                    break
+                METRICS.ship(event_queue, "inference")
+                continue
+            index, slot = taken
+            # The next wait starts after this camera, so a busy camera cannot starve the others.
+            turn = index + 1
+            pipeline.submit(FrameJob(slot.array, slot.timestamp, slot, camera=index))
+
+        pipeline.stop(timeout=5.0)
+        for inspector, writer in zip(inspectors, writers):
+            inspector.flush()
+            writer.close(timeout=5.0)
+        catalogue.close()
+        sam2.close()
+
+    def video_feed(self, camera = None):
+        """
+        Flask route for the video stream.
+        Returns a multipart response of the stream chosen with ?stream=<name> of
+        the camera in the path, the first camera for plain /video_feed.
+        """
+        if camera is None:
+            camera = self.cameras[0].name
+        if camera not in self.camera_index:
+            return jsonify({
+                    "status": "failure",
+                    "message": f"Unknown camera '{camera}'. Available: {', '.join(self.camera_index)}",
+                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                }), 404
+        hubs = self.camera_index[camera].hubs
+        name = request.args.get('stream', self.camera_index[camera].default_stream)
+        if name not in hubs:
+            return jsonify({
+                    "status": "failure",
+                    "message": f"Unknown stream '{name}'. Available: {', '.join(hubs)}",
+                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                }), 404
+        return Response(hubs[name].subscribe(),
+                    mimetype='multipart/x-mixed-replace; boundary=frame')
 
+    def event_pump(self):
+        """
+        Forward events of the inference process to the EventBus.
+        """
+        while self.running:
             try:
-                (latest_mask, segments) = self.result_queue.get_nowait()
-                hold_count = 10
+                event = self.event_queue.get(timeout=1.0)
             except queue.Empty:
-                pass
-
-            if latest_mask is not None and self.is_active.value and hold_count > 0:
-                contours, _ = cv2.findContours(latest_mask[:,:], cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                cv2.drawContours(frame, contours, -1, (0, 255, 0), 2)
-                for seg in segments:
-                    cv2.polylines(frame, np.int32([seg]), True, (255, 0, 0), 3)
-                hold_count -= 1
-
-            frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-            ret, buffer = cv2.imencode('.jpg', frame)
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
-
-    def video_feed(self):
+                continue
+            if event is None:
+                break
+            kind, data = event
+            if kind == "metrics":
+                process, snapshot = data
+                self.remote_metrics[process] = snapshot
+                continue
+            if kind == "profile":
+                self.profiles.put(data)
+                continue
+            if kind == "model":
+                name, info = data
+                self.models[name] = info
+                if name == "yolov8" and info["state"] == "ready":
+                    # From now on the inference deadline applies, counted from the end of loading.
+                    self.heartbeat.value = time.time()
+                self._update_ready()
+                kind, data = "status", {"ready": self.readiness(), "patrol_status": "Active" if self.is_active.value else "Inactive"}
+            # Results stay catalogue rows until events() knows the host of each client.
+            self.event_bus.publish(kind, data)
+
+    def events(self):
         """
-        Flask route for the video stream.
-        Returns a multipart response.
+        Flask route for the Server-Sent Events stream.
+        Pushes "result" events with one new catalogue item each, with the same
+        absolute URLs as /get_result, and "status" events with the changed
+        /get_status fields.
         """
-        return Response(self.generate_frames(),
-                    mimetype='multipart/x-mixed-replace; boundary=frame')
+        try:
+            last_id = int(request.headers.get('Last-Event-ID', ''))
+        except ValueError:
+            last_id = None
+        base_url = request.host_url.rstrip('/')
+        prepare = lambda kind, data: self._result_item(base_url, data) if kind == "result" else data
+        return Response(self.event_bus.subscribe(last_id, prepare), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
     def start_patrol(self):
         """
@@ -215,6 +514,7 @@ class WebUI(object):
         Updates status flag and returns JSON response.
         """
         self.is_active.value = True
+        self.event_bus.publish("status", {"patrol_status": "Active", "text": "Active"})
         return jsonify({
                 "status": "success",
                 "message": "Inspection System Active!",
@@ -226,6 +526,7 @@ class WebUI(object):
         API to stop the patrol system.
         """
         self.is_active.value = False
+        self.event_bus.publish("status", {"patrol_status": "Inactive", "text": "Inactive"})
         return jsonify({
                 "status": "success",
                 "message": "Inspection System Deactivated!",
@@ -240,17 +541,126 @@ class WebUI(object):
             status = "Active"
         else:
             status = "Inactive"
-        return jsonify({
+        # "motion" and "scheduler" stay those of the first camera for existing clients.
+        result = {
             "patrol_status": status,
             "text": status,
             "det_step": str(self.inference_interval.value),
+            "writer": self.writer_stats.as_dict(),
+            "motion": self.cameras[0].motion.status(),
+            "scheduler": self.cameras[0].scheduler.status(),
+            "cameras": {camera.name: camera.status() for camera in self.cameras},
+            "ready": self.readiness(),
+            "inference": {"alive": self.p.is_alive(), "restarts": self.inference_restarts,
+                          "heartbeat_age": round(time.time() - self.heartbeat.value, 1)},
+            "sam2_pool": self.sam2_pool.status(),
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        })
+        }
+        # ?metrics=1 adds a per-stage timing summary of every process.
+        if request.args.get('metrics'):
+            result["metrics"] = {process: METRICS.summary(snapshot) for process, snapshot in self._snapshots().items()}
+        return jsonify(result)
+
+    def _update_ready(self):
+        # Every model needs one ready instance; SAM2 replicas are named "sam2/<index>".
+        groups = {}
+        for name, info in self.models.items():
+            groups.setdefault(name.split("/")[0], []).append(info["state"] == "ready")
+        ready = all(any(states) for states in groups.values())
+        if ready and not self.models_ready.is_set():
+            self.load_time = time.time() - self.load_start
+            self.models_ready.set()
+            print(f"Models ready in {self.load_time:.2f} s")
+        elif not ready and self.models_ready.is_set():
+            self.models_ready.clear()
+            self.load_start, self.load_time = time.time(), None
+
+    def readiness(self):
+        """
+        Whether every model is loaded and warmed up, the seconds it took (or has
+        taken so far), and the state and timings of each model.
+        """
+        ready = self.models_ready.is_set()
+        return {
+            "ready": ready,
+            "elapsed_s": round(self.load_time if ready else time.time() - self.load_start, 3),
+            "models": {name: dict(info) for name, info in self.models.items()},
+        }
+
+    def ready(self):
+        """
+        Readiness probe: 200 once the models are loaded and warmed up, 503 before.
+        """
+        readiness = self.readiness()
+        return jsonify(readiness), 200 if readiness["ready"] else 503
+
+    def _snapshots(self):
+        return dict({"web": METRICS.snapshot()}, **self.remote_metrics)
+
+    def metrics(self):
+        """
+        Timing histograms and event counters of all processes in Prometheus text format.
+        """
+        return Response(METRICS.render(self._snapshots()), mimetype='text/plain; version=0.0.4')
+
+    def profile(self):
+        """
+        Sample the stacks of the "web" or "inference" process (?process=) for
+        ?seconds= (default 5) and return them in the collapsed format flame graph tools read.
+        """
+        process = request.args.get('process', 'inference')
+        try:
+            seconds = float(request.args.get('seconds', 5.0))
+            if not 0.0 < seconds <= MAX_PROFILE_SECONDS or process not in ('web', 'inference'):
+                raise ValueError
+        except ValueError:
+            return jsonify({
+                    "status": "failure",
+                    "message": f"Expected 0 < seconds <= {MAX_PROFILE_SECONDS} and process 'web' or 'inference'.",
+                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                }), 400
+
+        # One trace at a time, so answers cannot get mixed up.
+        if not self.profile_lock.acquire(blocking=False):
+            return jsonify({
+                    "status": "failure",
+                    "message": "A profile is already being taken.",
+                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                }), 409
+        try:
+            if process == 'web':
+                trace = sample_stacks(seconds)
+            else:
+                while not self.profiles.empty():
+                    self.profiles.get_nowait()
+                try:
+                    self.inference_conn.send(seconds)
+                except OSError:
+                    # Between an exit and the restart.
+                    abort(503)
+                try:
+                    trace = self.profiles.get(timeout=seconds + 10.0)
+                except queue.Empty:
+                    abort(504)
+        finally:
+            self.profile_lock.release()
+        return Response(trace, mimetype='text/plain')
+
+    def _targets(self, json_data):
+        """
+        Cameras a settings request applies to: the one named by its "camera" field, or all.
+        """
+        if "camera" not in json_data:
+            return self.cameras
+        if json_data["camera"] not in self.camera_index:
+            raise ValueError(f"Unknown camera '{json_data['camera']}'")
+        return [self.camera_index[json_data["camera"]]]
 
     def set_interval(self):
         json_data = request.get_json()
         try:
             self.inference_interval.value = float(json_data["step"])
+            self.event_bus.publish("status", {"det_step": str(self.inference_interval.value)})
             return jsonify({
                     "status": "success",
                     "message": "Interval set successfully.",
@@ -263,24 +673,141 @@ class WebUI(object):
                     "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 }), 200
 
+    def set_motion(self):
+        """
+        API to configure the motion gate.
+        Accepts any of "threshold" (fraction of changed pixels, 0 disables gating)
+        and "max_staleness" (seconds), for the camera named by "camera" or all cameras.
+        """
+        json_data = request.get_json(silent=True) or {}
+        try:
+            cameras = self._targets(json_data)
+            motion = cameras[0].motion
+            threshold = float(json_data.get("threshold", motion.threshold))
+            max_staleness = float(json_data.get("max_staleness", motion.max_staleness))
+            if not 0.0 <= threshold <= 1.0 or max_staleness <= 0.0:
+                raise ValueError("expected 0 <= threshold <= 1 and max_staleness > 0")
+        except (TypeError, ValueError) as e:
+            return jsonify({
+                    "status": "failure",
+                    "message": f"Failed to set motion gate: {e}",
+                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                }), 200
+        for camera in cameras:
+            camera.motion.threshold = threshold
+            camera.motion.max_staleness = max_staleness
+        self.event_bus.publish("status", {"motion": self.cameras[0].motion.status(),
+                                          "cameras": {camera.name: camera.status() for camera in self.cameras}})
+        return jsonify({
+                "status": "success",
+                "message": "Motion gate set successfully.",
+                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            }), 200
+
+    def set_scheduler(self):
+        """
+        API to configure the inference scheduler.
+        Accepts any of "mode" ("fixed" or "adaptive"), "duty_cycle", "min_rate" and "max_rate",
+        for the camera named by "camera" or all cameras; the fixed-mode interval is
+        still set through /set_det_step.
+        """
+        json_data = request.get_json(silent=True) or {}
+        try:
+            cameras = self._targets(json_data)
+            scheduler = cameras[0].scheduler
+            settings = (json_data.get("mode", scheduler.mode),
+                        float(json_data.get("duty_cycle", scheduler.duty_cycle)),
+                        float(json_data.get("min_rate", scheduler.min_rate)),
+                        float(json_data.get("max_rate", scheduler.max_rate)))
+            for camera in cameras:
+                camera.scheduler.configure(*settings)
+        except (TypeError, ValueError) as e:
+            return jsonify({
+                    "status": "failure",
+                    "message": f"Failed to set scheduler: {e}",
+                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                }), 200
+        self.event_bus.publish("status", {"scheduler": self.cameras[0].scheduler.status(),
+                                          "cameras": {camera.name: camera.status() for camera in self.cameras}})
+        return jsonify({
+                "status": "success",
+                "message": "Scheduler set successfully.",
+                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            }), 200
+
     def serve_result_file(self, filename):
         return send_from_directory(self.save_dir, filename)
 
+    def serve_result_thumb(self, filename):
+        # Results may sit in a camera subdirectory, but never outside save_dir.
+        if safe_join(self.save_dir, filename) is None:
+            abort(404)
+        thumb = self.catalogue.thumbnail(filename)
+        if thumb is None:
+            abort(404)
+        return send_from_directory(self.catalogue.thumbs_dir, thumb)
+
+    def _result_item(self, base_url, row):
+        row_id, name, time = row
+        camera = name.split('/', 1)[0] if '/' in name else self.cameras[0].name
+        return {
+            'id': row_id,
+            'time': time,
+            'camera': camera,
+            'path': f"{base_url}/result_files/{name}",
+            'thumb': f"{base_url}/result_thumbs/{name}"
+        }
+
     def get_result(self):
-        base_url = request.host_url.rstrip('/')
-        data_list = []
+        """
+        API to list saved results from the catalogue.
+        Without parameters returns every result as a list, oldest first. With
+        `since` (the cursor of a previous answer) and/or `limit` returns
+        {"items", "cursor", "latest", "total"} with at most `limit` results newer
+        than `since`. `camera` restricts either form to the results of one camera.
+        Answers carry an ETag, so unchanged polls get a 304.
+        """
+        paged = 'since' in request.args or 'limit' in request.args
+        camera = request.args.get('camera')
+        if camera is not None and camera not in self.camera_index:
+            return jsonify({
+                    "status": "failure",
+                    "message": f"Unknown camera '{camera}'. Available: {', '.join(self.camera_index)}",
+                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                }), 404
+        # A single camera saves to the top of save_dir, so it needs no filter.
+        subdir = camera if len(self.cameras) > 1 else None
         try:
-            files = sorted(os.listdir(self.save_dir))
-            for filename in files:
-                if filename.endswith(".jpg"):
-                    name = filename.replace(".jpg", "")
-                    timestamp = name[:10].replace("_", "-") + " " + name[11:19].replace("_", ":") + "." + name[20:]
-                    file_url = f"{base_url}/result_files/{filename}"
-                    data_list.append({'time': timestamp, 'path': file_url})
-        except FileNotFoundError:
-            pass
-        return jsonify(data_list)
-     
+            since = int(request.args.get('since', 0))
+            limit = int(request.args['limit']) if 'limit' in request.args else None
+        except ValueError:
+            return jsonify({
+                    "status": "failure",
+                    "message": "since and limit must be integers.",
+                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                }), 400
+
+        latest, total = self.catalogue.version(subdir)
+        etag = f"{latest}-{total}-{since}-{limit}-{int(paged)}-{subdir or ''}"
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            base_url = request.host_url.rstrip('/')
+            rows = self.catalogue.query(since, limit, subdir)
+            items = [self._result_item(base_url, row) for row in rows]
+            if paged:
+                response = jsonify({
+                    "items": items,
+                    "cursor": rows[-1][0] if rows else since,
+                    "latest": latest,
+                    "total": total
+                })
+            else:
+                response = jsonify(items)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
     def handle_exit(self, signum, frame):
         self.stop()
         sys.exit(0)
@@ -288,16 +815,17 @@ class WebUI(object):
     def stop(self):
         self.is_active.value = False
 
-        if hasattr(self, 'input_queue'):
-            try:
-                while not self.input_queue.empty():
-                    self.input_queue.get_nowait()
-                self.input_queue.put((None, None)) 
-            except:
-                pass
-        
-        if hasattr(self, 'cap') and self.cap.isOpened():
-            self.cap.release()
+        self.running = False
+        if hasattr(self, 'supervisor') and self.supervisor.is_alive():
+            self.supervisor.join(timeout=2.0)
+        if hasattr(self, 'event_bus'):
+            self.event_bus.close()
+        if hasattr(self, 'event_thread') and self.event_thread.is_alive():
+            self.event_queue.put(None)
+            self.event_thread.join(timeout=2.0)
+
+        for camera in getattr(self, 'cameras', []):
+            camera.stop()
 
         if hasattr(self, 'p') and self.p.is_alive():
             self.p.join(timeout=2.0)
@@ -305,32 +833,94 @@ class WebUI(object):
                 self.p.terminate()
                 self.p.join()
 
+        if hasattr(self, 'sam2_pool'):
+            self.sam2_pool.stop()
+
+    def wait_ready(self):
+        """
+        Block until every model is ready. Raises RuntimeError if one fails to load
+        or its process dies.
+        """
+        print("Loading models...")
+        while not self.models_ready.wait(1.0):
+            failed = [f"{name}: {info.get('error')}" for name, info in self.models.items() if info["state"] == "failed"]
+            if failed:
+                raise RuntimeError("Model loading failed: " + "; ".join(failed))
+
     def run(self, port=3333, host='0.0.0.0'):
         """
-        Register routes and start the Flask server.
+        Register routes and start the Flask server, once the models are ready unless lazy_load is set.
         """
         try:
+            if not self.lazy_load:
+                self.wait_ready()
             self.app.run(host=host, port=port, debug=False, use_reloader=False)
         finally:
             self.stop()
 
 if __name__ == '__main__':
+    # Child processes are restarted from the threaded WebUI, so they start from a clean fork server instead of forking it.
+    mp.set_start_method("forkserver")
     parser = argparse.ArgumentParser(description="YOLOv8 + SAM2 WebUI")
-    parser.add_argument('--source', type=str, required=True, help='Camera ID')
-    parser.add_argument('--resolution', type=int, nargs=2, default=[1280, 720], help='Width and height of the window (default: 1280 720)')   
-    parser.add_argument('--class-id', type=int, default=0, help='Class ID to detect')
+    parser.add_argument('--source', type=str, action='append', required=True, help='Camera ID or video path, repeatable for several cameras')
+    parser.add_argument('--resolution', type=int, nargs=2, action='append', default=None, help='Width and height of the window, repeatable per camera (default: 1280 720)')   
+    parser.add_argument('--class-id', type=int, action='append', default=None, help='Class ID to detect, repeatable per camera (default: 0)')
     parser.add_argument('--port', type=int, default=3333, help='Web server port')
     parser.add_argument('--save-dir', type=str, default=None, help='Directory to save results')
+    parser.add_argument('--backend', type=str, default='qnn', choices=BACKENDS, help='Inference backend (default: qnn)')
+    parser.add_argument('--save-format', type=str, default='jpg', choices=list(ENCODERS), help='Result image format (default: jpg)')
+    parser.add_argument('--save-quality', type=int, default=None, help='JPEG/WebP quality 0-100 or PNG compression 0-9 (default: OpenCV default)')
+    parser.add_argument('--sidecar', action='store_true', help='Write a JSON sidecar with boxes and RLE defect masks for each result')
+    parser.add_argument('--motion-threshold', type=float, default=0.01, help='Fraction of changed pixels needed to run inference on a frame, 0 disables gating (default: 0.01)')
+    parser.add_argument('--max-staleness', type=float, default=30.0, help='Seconds after which a frame is inferred even if nothing changed (default: 30)')
+    parser.add_argument('--scheduler', type=str, default='fixed', choices=SCHEDULER_MODES, help='fixed: infer every interval; adaptive: as fast as the pipeline allows (default: fixed)')
+    parser.add_argument('--duty-cycle', type=float, default=0.8, help='Fraction of time the slowest stage may be busy in adaptive mode (default: 0.8)')
+    parser.add_argument('--min-rate', type=float, default=0.2, help='Lowest inference rate in adaptive mode, frames per second (default: 0.2)')
+    parser.add_argument('--max-rate', type=float, default=10.0, help='Highest inference rate in adaptive mode, frames per second (default: 10)')
+    parser.add_argument('--overlay-tile', action='store_true', help='Pre-render result overlays into a tile the stream loop only copies')
+    parser.add_argument('--capture-backend', type=str, default='auto', choices=CAPTURE_BACKENDS, help='Open cameras through OpenCV\'s default, V4L2 or a GStreamer pipeline (default: auto)')
+    parser.add_argument('--gst-decoder', type=str, default='jpegdec', help='JPEG decoder element of the GStreamer camera pipeline, e.g. v4l2jpegdec (default: jpegdec)')
+    parser.add_argument('--warmup', type=int, default=1, help='Inferences each model runs on dummy inputs after loading (default: 1)')
+    parser.add_argument('--lazy-load', action='store_true', help='Serve the UI and streams right away while the models load in the background')
+    parser.add_argument('--all-classes', action='store_true', help='Decode and draw the boxes of every class, not only --class-id')
+    parser.add_argument('--sam2-replicas', type=int, default=1, help='SAM2 processes segmenting crops in parallel, each with its own context (default: 1)')
+    parser.add_argument('--sam2-deadline', type=float, default=10.0, help='Seconds a SAM2 replica may spend on one batch of crops before it is restarted (default: 10)')
+    parser.add_argument('--load-deadline', type=float, default=120.0, help='Seconds a model process may take to load and warm up before it is restarted (default: 120)')
+    parser.add_argument('--inference-deadline', type=float, default=60.0, help='Seconds a frame may stay in the inference pipeline before the inference process is restarted (default: 60)')
+    parser.add_argument('--no-track', action='store_true', help='Segment and save every defect frame instead of once per tracked object')
+    parser.add_argument('--stream', type=str, action='append', default=None, help='MJPEG stream as name:quality[:width], repeatable (default: main:95 preview:60:640)')
     args = parser.parse_args()
 
-    if "ADSP_LIBRARY_PATH" not in os.environ:
+    if args.backend == "qnn" and "ADSP_LIBRARY_PATH" not in os.environ:
         raise("ADSP_LIBRARY_PATH is not set.")
 
     ui = WebUI(
-        source=args.source,
-        resolution=args.resolution,
+        sources=args.source,
+        resolutions=args.resolution or [[1280, 720]],
         save_dir=args.save_dir,
-        target_class_id=args.class_id
+        class_ids=args.class_id or [0],
+        backend=args.backend,
+        streams=args.stream,
+        save_format=args.save_format,
+        save_quality=args.save_quality,
+        sidecar=args.sidecar,
+        motion_threshold=args.motion_threshold,
+        max_staleness=args.max_staleness,
+        track=not args.no_track,
+        scheduler=args.scheduler,
+        duty_cycle=args.duty_cycle,
+        min_rate=args.min_rate,
+        max_rate=args.max_rate,
+        overlay_tile=args.overlay_tile,
+        capture_backend=args.capture_backend,
+        gst_decoder=args.gst_decoder,
+        warmup=args.warmup,
+        lazy_load=args.lazy_load,
+        all_classes=args.all_classes,
+        sam2_replicas=args.sam2_replicas,
+        sam2_deadline=args.sam2_deadline,
+        load_deadline=args.load_deadline,
+        inference_deadline=args.inference_deadline
     )
 
     ui.run(port=args.port)
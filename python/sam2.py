@@ -6,42 +6,90 @@
 #
 #==============================================================================
 
-import os
+import time
+
 import cv2
 import numpy as np
 
-from utils import eqprocess, sigmoid
-import infertoypy
+from metrics import METRICS
+from utils import Letterbox, sigmoid
+from backend import create_backend, sam2_synthetic
 
 class SAM2(object):
-    def __init__(self, model_path):
-        self.model = infertoypy.InferToy()
-        res = self.model.init([
-            "qnn-sample-app",
-            "--retrieve_context", model_path,
-            "--backend", os.path.join(os.environ['ADSP_LIBRARY_PATH'], "libQnnHtp.so"),
-            "--system_library", os.path.join(os.environ['ADSP_LIBRARY_PATH'], "libQnnSystem.so"),
-            "--log_level", "error"
-        ])
+    def __init__(self, model_path, batch_size = 1, backend = "qnn", **backend_options):
+        """
+        Args:
+            model_path: Path to the SAM2 QNN context binary.
+            batch_size: Number of crops the context consumes per run (1 for the shipped context).
+            backend: Backend name ("qnn", "numpy") or a Backend instance.
+            backend_options: Extra arguments for the NumPy stand-in (latency, seed).
+        """
+        self.size = 352
+        self.model = create_backend(backend, model_path, sam2_synthetic(self.size), **backend_options)
 
+        self.batch_size = batch_size
         self.mean_data = (123.675, 116.28, 103.53)
         self.std_data = (58.395, 57.12, 57.375)
+        self.letterbox = Letterbox(self.size, self.size, mean=self.mean_data, std=self.std_data, batch=batch_size)
 
     def __call__(self, frame, threshold = 0.8):
-        anti_size = max(frame.shape[:2])
-        img, scale = eqprocess(frame, 352, 352)
-        img = (img - self.mean_data) / self.std_data
-        img = img.astype(np.float32)
-
-        result = self.model.set(0, img)
-        result = self.model.run()
-        qnn_out, data_len = self.model.get(0)
-        res = sigmoid(qnn_out.reshape(352,352))
-        res = (res - res.min()) / (res.max() - res.min() + 1e-8)
-        res = cv2.resize(res, (anti_size, anti_size))[:frame.shape[0], :frame.shape[1]]
-        mask = (res > threshold)
-        mask = mask.astype('uint8')
-        return mask
+        return self.batch([frame], threshold)[0]
+
+    def batch(self, frames, threshold = 0.8):
+        """
+        Segment a list of crops.
+        Crops are letterboxed and normalized into one reused stacked buffer, the context
+        is fed `batch_size` crops per run, and sigmoid / min-max normalization are
+        applied to all outputs at once. Returns one uint8 mask per crop, each the
+        size of its crop.
+        """
+        n = len(frames)
+        if n == 0:
+            return []
+
+        start = time.perf_counter()
+        size = self.size
+        batch_size = self.batch_size
+        chunks = -(-n // batch_size)
+        imgs = self.letterbox.reserve(chunks * batch_size)
+        for i, frame in enumerate(frames):
+            self.letterbox(frame, i)
+
+        t_run = time.perf_counter()
+        METRICS.observe("sam2_preprocess", t_run - start)
+
+        model_set, model_run, model_get = self.model.set, self.model.run, self.model.get
+        outs = []
+        for offset in range(0, len(imgs), batch_size):
+            # The shipped context takes one (352, 352, 3) crop; only batched contexts get a leading batch axis.
+            model_set(0, imgs[offset] if batch_size == 1 else imgs[offset:offset + batch_size])
+            model_run()
+            qnn_out, data_len = model_get(0)
+            outs.append(qnn_out)
+        res = np.concatenate(outs).reshape(-1, size, size)[:n]
+        t_postprocess = time.perf_counter()
+        METRICS.observe("sam2_run", t_postprocess - t_run)
+
+        res = sigmoid(res)
+        res_min = res.min(axis=(1, 2), keepdims=True)
+        res_max = res.max(axis=(1, 2), keepdims=True)
+        res = (res - res_min) / (res_max - res_min + 1e-8)
+
+        masks = []
+        for i, frame in enumerate(frames):
+            anti_size = max(frame.shape[:2])
+            mask = cv2.resize(res[i], (anti_size, anti_size))[:frame.shape[0], :frame.shape[1]]
+            masks.append((mask > threshold).astype('uint8'))
+        METRICS.observe("sam2_postprocess", time.perf_counter() - t_postprocess)
+        return masks
+
+    def warmup(self, runs = 1):
+        """
+        Run the context `runs` times on a full batch of blank crops.
+        """
+        crops = [np.zeros((self.size, self.size, 3), dtype=np.uint8)] * self.batch_size
+        for _ in range(runs):
+            self.batch(crops)
 
     def __del__(self):
         self.model.destroy()
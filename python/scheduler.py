@@ -0,0 +1,150 @@
+#==============================================================================
+#
+# Copyright (c) 2026, Qualcomm Innovation Center, Inc. All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+#
+#==============================================================================
+
+import math
+import time
+from collections import deque
+import multiprocessing as mp
+
+SCHEDULER_MODES = ("fixed", "adaptive")
+
+class StageStats(object):
+    """
+    Service time and drop count of each inference pipeline stage in shared
+    memory, written by the inference process and read by the scheduler.
+    Every update overwrites all values, so they need no lock that a dying
+    inference process could leave held.
+    """
+    def __init__(self, stages):
+        self.stages = tuple(stages)
+        self.latency = mp.RawArray('d', len(self.stages))
+        self.dropped = mp.RawArray('q', len(self.stages))
+
+    def update(self, pipeline):
+        latency, dropped = pipeline.latency(), pipeline.dropped()
+        self.latency[:] = [latency[name] for name in self.stages]
+        self.dropped[:] = [dropped[name] for name in self.stages]
+
+    def bottleneck(self):
+        """
+        Service time of the slowest stage in seconds, 0.0 before the first frame.
+        """
+        return max(self.latency[:])
+
+    def as_dict(self):
+        return {
+            "latency_ms": {name: round(value * 1000.0, 2) for name, value in zip(self.stages, self.latency[:])},
+            "dropped": dict(zip(self.stages, self.dropped[:])),
+        }
+
+class Scheduler(object):
+    """
+    Scheduler Class
+
+    Decides when the capture loop hands the next frame to inference.
+    In "fixed" mode a frame is due every `interval` seconds. In "adaptive" mode
+    the period follows the measured pipeline: the bottleneck stage's service
+    time divided by `duty_cycle`, clamped to [1 / max_rate, 1 / min_rate].
+    On top of that, a frame is held back while `max_in_flight` frames still
+    occupy the input ring, so frames wait in the camera instead of being dropped.
+    When several sources share the pipeline, each gets `share` of its capacity.
+    """
+    def __init__(self,
+                 interval,
+                 stage_stats: StageStats,
+                 ring,
+                 mode: str = "fixed",
+                 duty_cycle: float = 0.8,
+                 min_rate: float = 0.2,
+                 max_rate: float = 10.0,
+                 max_in_flight: int = None,
+                 window: float = 10.0,
+                 share: float = 1.0):
+        """
+        Args:
+            interval: Shared mp.Value with the fixed-mode interval in seconds.
+            stage_stats: StageStats of the inference pipeline.
+            ring: Input SharedRing of the inference process.
+            mode: One of SCHEDULER_MODES.
+            duty_cycle: Fraction of time the bottleneck stage may be busy in adaptive mode (0-1].
+            min_rate: Lowest dispatch rate in frames per second in adaptive mode.
+            max_rate: Highest dispatch rate in frames per second in adaptive mode.
+            max_in_flight: Frames allowed in the input ring in adaptive mode (default: one per stage, times share).
+            window: Seconds over which the effective rate is measured.
+            share: Fraction of the pipeline this source may use in adaptive mode.
+        """
+        self.interval = interval
+        self.stage_stats = stage_stats
+        self.ring = ring
+        self.configure(mode, duty_cycle, min_rate, max_rate)
+        self.share = share
+        self.max_in_flight = max_in_flight if max_in_flight is not None else max(1, math.ceil(len(stage_stats.stages) * share))
+        self.window = window
+        self.dispatches = deque()
+        self.last = 0.0
+        self.held = 0
+        self.holding = False
+
+    def configure(self, mode, duty_cycle, min_rate, max_rate):
+        if mode not in SCHEDULER_MODES:
+            raise ValueError(f"Unknown scheduler mode '{mode}', expected one of {', '.join(SCHEDULER_MODES)}")
+        if not 0.0 < duty_cycle <= 1.0 or not 0.0 < min_rate <= max_rate:
+            raise ValueError("Expected 0 < duty_cycle <= 1 and 0 < min_rate <= max_rate")
+        self.mode, self.duty_cycle, self.min_rate, self.max_rate = mode, duty_cycle, min_rate, max_rate
+
+    def period(self):
+        if self.mode == "fixed":
+            return self.interval.value
+        period = self.stage_stats.bottleneck() / (self.duty_cycle * self.share)
+        return min(max(period, 1.0 / self.max_rate), 1.0 / self.min_rate)
+
+    def due(self, now):
+        if now - self.last < self.period():
+            return False
+        if self.mode == "adaptive" and self.ring.occupancy() >= self.max_in_flight:
+            # Counted once per hold, not once per frame captured while it lasts.
+            if not self.holding:
+                self.held += 1
+                self.holding = True
+            return False
+        self.holding = False
+        return True
+
+    def dispatched(self, now):
+        """
+        Record a frame that made it into the input ring.
+        """
+        self.last = now
+        self.dispatches.append(now)
+        while now - self.dispatches[0] > self.window:
+            self.dispatches.popleft()
+
+    def rate(self, now = None):
+        """
+        Frames dispatched per second over the last `window` seconds.
+        """
+        now = time.time() if now is None else now
+        recent = [t for t in list(self.dispatches) if now - t <= self.window]
+        if not recent:
+            return 0.0
+        # Measured over the time actually covered, so the first window does not read low.
+        return len(recent) / max(now - recent[0], 1.0 / self.max_rate)
+
+    def status(self):
+        status = {
+            "mode": self.mode,
+            "duty_cycle": self.duty_cycle,
+            "min_rate": self.min_rate,
+            "max_rate": self.max_rate,
+            "target_rate": round(1.0 / self.period(), 3) if self.period() > 0 else None,
+            "rate": round(self.rate(), 3),
+            "held": self.held,
+            "ring_dropped": self.ring.dropped.value,
+        }
+        status.update(self.stage_stats.as_dict())
+        return status
@@ -0,0 +1,294 @@
+#==============================================================================
+#
+# Copyright (c) 2026, Qualcomm Innovation Center, Inc. All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+#
+#==============================================================================
+
+import time
+import pickle
+from datetime import datetime
+from contextlib import contextmanager
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+
+FREE, WRITING, READY, READING = 0, 1, 2, 3
+# Seconds between attempts to take a ring lock, so a waiter notices when it was renewed.
+LOCK_RETRY = 0.1
+
+class RingSync(object):
+    """
+    Lock and doorbell of one or more SharedRings. Writers ring the doorbell
+    after publishing; the reader, of which there must be one, empties it before
+    it looks at the rings and then waits for it to ring. Unlike an
+    mp.Condition, nothing here waits for other processes, so a process that
+    dies waiting leaves nothing behind, and a process that dies holding the
+    lock can be replaced with renew().
+    """
+    def __init__(self):
+        self.lock = mp.Lock()
+        self.doorbell = mp.Semaphore(0)
+
+    @contextmanager
+    def locked(self):
+        while True:
+            # Re-read on every attempt: renew() may have replaced a lock held forever.
+            lock = self.lock
+            if lock.acquire(timeout=LOCK_RETRY):
+                break
+        try:
+            yield
+        finally:
+            lock.release()
+
+    def ring(self):
+        self.doorbell.release()
+
+    def clear(self):
+        while self.doorbell.acquire(False):
+            pass
+
+    def wait(self, timeout = None):
+        return self.doorbell.acquire(timeout=timeout)
+
+    def renew(self, timeout = 1.0):
+        """
+        Replace the lock, which another process may have died holding. Only
+        affects this process and the processes started after it, so it must
+        be called while no other process uses the rings, e.g. between the
+        death and the restart of their reader.
+        """
+        # Held by a live thread only briefly; taken, or lost with a dead holder, it is never released.
+        self.lock.acquire(timeout=timeout)
+        self.lock = mp.Lock()
+
+class RingSlot(object):
+    """
+    A slot claimed from a SharedRing. `array` is a NumPy view into shared memory,
+    valid until the slot is published (writer side) or released (reader side).
+    """
+    def __init__(self, index, array, seq = 0, timestamp = None, meta = None):
+        self.index = index
+        self.array = array
+        self.seq = seq
+        self.timestamp = timestamp
+        self.meta = meta
+
+class SharedRing(object):
+    """
+    SharedRing Class
+
+    Fixed-shape array slots in multiprocessing.shared_memory, handed between
+    processes without pickling the array data. Every published slot gets a
+    sequence number and only the newest one is ever handed to a reader
+    (latest wins); a writer never blocks. Each slot can carry a small pickled
+    `meta` object next to the array. Rings that share `sync` can be read
+    together with select().
+    """
+    def __init__(self, shape, dtype = np.uint8, slots = 3, meta_size = 0, sync = None):
+        """
+        Args:
+            shape: Array shape of one slot, e.g. (height, width, 3).
+            dtype: Array dtype.
+            slots: Number of slots; one writer, one pending and one reader need 3.
+            meta_size: Bytes reserved per slot for the pickled meta object.
+            sync: RingSync to share with other rings (a private one is created when None).
+        """
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.slots = slots
+        self.meta_size = meta_size
+        self.array_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        self.slot_bytes = (self.array_bytes + meta_size + 63) // 64 * 64
+
+        self.shm = shared_memory.SharedMemory(create=True, size=self.slot_bytes * slots)
+        self.sync = sync if sync is not None else RingSync()
+        self.state = mp.RawArray('q', slots)
+        self.seqs = mp.RawArray('q', slots)
+        self.times = mp.RawArray('d', slots)
+        self.meta_len = mp.RawArray('q', slots)
+        self.last_seq = mp.RawValue('q', 0)
+        self.dropped = mp.RawValue('q', 0)
+        self.closed = mp.RawValue('b', False)
+
+    def _array(self, index):
+        return np.ndarray(self.shape, dtype=self.dtype, buffer=self.shm.buf, offset=index * self.slot_bytes)
+
+    def _meta(self, index):
+        start = index * self.slot_bytes + self.array_bytes
+        return self.shm.buf[start:start + self.meta_size]
+
+    def claim(self, overwrite = False):
+        """
+        Reserve a slot for writing.
+        Returns None, counting a dropped frame, when the reader has not taken the
+        pending slot yet and `overwrite` is False (drop when busy), or when no slot is free.
+        """
+        with self.sync.locked():
+            state = self.state
+            if not overwrite and READY in state[:]:
+                self.dropped.value += 1
+                return None
+            for index in range(self.slots):
+                if state[index] == FREE:
+                    state[index] = WRITING
+                    return RingSlot(index, self._array(index))
+            self.dropped.value += 1
+            return None
+
+    def publish(self, slot, timestamp = None, meta = None):
+        """
+        Hand a claimed slot to the reader. An older slot still pending is
+        superseded and counted as dropped. Returns the sequence number.
+        """
+        length = 0
+        if meta is not None:
+            data = pickle.dumps(meta, protocol=pickle.HIGHEST_PROTOCOL)
+            length = len(data)
+            if length > self.meta_size:
+                self.abort(slot)
+                raise ValueError(f"Ring meta of {length} bytes exceeds the {self.meta_size} byte slot area")
+            self._meta(slot.index)[:length] = data
+
+        with self.sync.locked():
+            for index in range(self.slots):
+                if self.state[index] == READY:
+                    self.state[index] = FREE
+                    self.dropped.value += 1
+            self.last_seq.value += 1
+            slot.seq = self.last_seq.value
+            self.seqs[slot.index] = slot.seq
+            self.times[slot.index] = timestamp.timestamp() if timestamp is not None else 0.0
+            self.meta_len[slot.index] = length
+            self.state[slot.index] = READY
+        self.sync.ring()
+        return slot.seq
+
+    def occupancy(self):
+        """
+        Number of slots currently claimed, pending or being read.
+        """
+        return sum(1 for state in self.state[:] if state != FREE)
+
+    def abort(self, slot):
+        """
+        Return a claimed slot without publishing it.
+        """
+        with self.sync.locked():
+            self.state[slot.index] = FREE
+
+    def put(self, array, timestamp = None, meta = None, overwrite = False):
+        """
+        Copy `array` into a free slot and publish it. Returns False when dropped.
+        `array` may be None for a meta-only ring of shape (0,).
+        """
+        slot = self.claim(overwrite)
+        if slot is None:
+            return False
+        if array is not None:
+            np.copyto(slot.array, array)
+        self.publish(slot, timestamp, meta)
+        return True
+
+    def get(self, timeout = None):
+        """
+        Take the newest published slot for reading, waiting up to `timeout` seconds.
+        Returns a RingSlot viewing the shared array, or None on timeout or shutdown.
+        The slot must be handed back with release().
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            # Emptied before looking, so a publish() after the look rings for the wait.
+            self.sync.clear()
+            with self.sync.locked():
+                if self.closed.value:
+                    return None
+                if self.pending():
+                    taken = self._take()
+                    break
+            remaining = None if deadline is None else deadline - time.time()
+            if remaining is not None and remaining <= 0 or not self.sync.wait(remaining):
+                return None
+        return self._slot(*taken)
+
+    def pending(self):
+        return READY in self.state[:]
+
+    def _take(self):
+        # Caller holds the lock and has checked pending().
+        index = self.state[:].index(READY)
+        self.state[index] = READING
+        return index, self.seqs[index], self.times[index], self.meta_len[index]
+
+    def _slot(self, index, seq, stamp, length):
+        meta = pickle.loads(self._meta(index)[:length]) if length else None
+        timestamp = datetime.fromtimestamp(stamp) if stamp else None
+        return RingSlot(index, self._array(index), seq, timestamp, meta)
+
+    def get_nowait(self):
+        return self.get(timeout=0)
+
+    def release(self, slot):
+        with self.sync.locked():
+            self.state[slot.index] = FREE
+
+    def reclaim(self, state):
+        """
+        Free every slot in `state`, e.g. READING slots of a reader that died.
+        Returns the number of slots freed.
+        """
+        with self.sync.locked():
+            indices = [index for index in range(self.slots) if self.state[index] == state]
+            for index in indices:
+                self.state[index] = FREE
+        return len(indices)
+
+    def shutdown(self):
+        """
+        Wake up and stop all readers.
+        """
+        with self.sync.locked():
+            self.closed.value = True
+        self.sync.ring()
+
+    def close(self):
+        try:
+            self.shm.close()
+        except BufferError:
+            # NumPy views handed out by claim()/get() are still alive; the
+            # mapping goes away with the process.
+            pass
+
+    def unlink(self):
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+def select(rings, start = 0, timeout = None):
+    """
+    Take the newest slot of the first ring with one pending, checking the rings
+    round-robin from index `start`. The rings must share one RingSync.
+    Returns (ring index, RingSlot), or None on timeout or once every ring is shut down.
+    """
+    sync = rings[0].sync
+    order = [(start + k) % len(rings) for k in range(len(rings))]
+    deadline = None if timeout is None else time.time() + timeout
+    while True:
+        sync.clear()
+        with sync.locked():
+            if all(ring.closed.value for ring in rings):
+                return None
+            taken = None
+            for i in order:
+                if rings[i].pending() and not rings[i].closed.value:
+                    taken = rings[i]._take()
+                    break
+        if taken is not None:
+            return i, rings[i]._slot(*taken)
+        remaining = None if deadline is None else deadline - time.time()
+        if remaining is not None and remaining <= 0 or not sync.wait(remaining):
+            return None
@@ -0,0 +1,55 @@
+#==============================================================================
+#
+# Copyright (c) 2026, Qualcomm Innovation Center, Inc. All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+#
+#==============================================================================
+
+import os
+
+import cv2
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+def list_images(path):
+    return sorted(os.path.join(path, f) for f in os.listdir(path) if f.lower().endswith(IMAGE_EXTS))
+
+def iter_frames(path, resolution = None, loop = False):
+    """
+    Yield (name, BGR frame) from a video file, a single image or a directory of images.
+
+    Args:
+        path: Video file, image file or image directory.
+        resolution: Optional (width, height) every frame is resized to.
+        loop: Restart from the first frame when the source is exhausted.
+    """
+    while True:
+        count = 0
+        if os.path.isdir(path) or path.lower().endswith(IMAGE_EXTS):
+            files = list_images(path) if os.path.isdir(path) else [path]
+            for filename in files:
+                frame = cv2.imread(filename)
+                if frame is None:
+                    continue
+                count += 1
+                yield os.path.basename(filename), _resize(frame, resolution)
+        else:
+            cap = cv2.VideoCapture(path)
+            try:
+                while True:
+                    success, frame = cap.read()
+                    if not success:
+                        break
+                    yield f"{os.path.basename(path)}#{count}", _resize(frame, resolution)
+                    count += 1
+            finally:
+                cap.release()
+
+        if not loop or count == 0:
+            break
+
+def _resize(frame, resolution):
+    if resolution is None or (frame.shape[1], frame.shape[0]) == tuple(resolution):
+        return frame
+    return cv2.resize(frame, tuple(resolution))
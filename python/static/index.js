@@ -14,6 +14,9 @@
 /** Whether inspection is currently active */
 let patrolActive = false;
 
+/** Whether the server's models are loaded and warmed up */
+let modelsReady = true;
+
 /** Timer for notification auto-hide */
 let notificationTimer = null;
 
@@ -51,6 +54,24 @@ let currentPage = 1;
 /** Array containing all detection results */
 let allResults = [];
 
+/** Id of the newest result already loaded, sent as `since` on the next poll */
+let resultCursor = 0;
+
+/** Ids of the loaded results, so results arriving out of id order are merged once */
+let seenResults = new Set();
+
+/** Maximum number of results fetched per request */
+const resultBatchSize = 500;
+
+/** Server-sent event channel (null when not supported) */
+let eventSource = null;
+
+/** Whether the event channel is open; polling only runs while it is not */
+let eventsConnected = false;
+
+/** Whether the polling loops were started since the channel was last open */
+let pollingStarted = false;
+
 // =============================================================================
 // HTTP Request Wrapper
 // =============================================================================
@@ -149,40 +170,57 @@ function updateStatus(cb) {
   }
 
   request("/get_status")
-    .then((data) => {
-      // Get DOM elements
-      const statusValue = document.getElementById("statusValue");
-      const startBtn = document.getElementById("btn-start");
-      const endBtn = document.getElementById("btn-end");
-      const intervalInput = document.getElementById("intervalInput");
-
-      // Update detection interval placeholder
-      if (data.det_step !== undefined) {
-        intervalInput.placeholder = data.det_step;
-      }
-
-      // Toggle button visibility and status styling based on inspection state
-      if (data.patrol_status === "Active") {
-        statusValue.textContent = "ACTIVE";
-        statusValue.classList.add("active");
-        startBtn.classList.remove("btn-show");
-        endBtn.classList.add("btn-show");
-      } else {
-        statusValue.textContent = "IDLE";
-        statusValue.classList.remove("active");
-        startBtn.classList.add("btn-show");
-        endBtn.classList.remove("btn-show");
-      }
-    })
+    .then(applyStatus)
     .catch((error) => console.error("Error:", error))
     .finally(() => {
-      // Schedule next status poll
-      statusTimer = setTimeout(updateStatus, timerTimeout);
+      // Schedule next status poll unless the event channel pushes updates
+      if (!eventsConnected) {
+        statusTimer = setTimeout(updateStatus, timerTimeout);
+      }
       // Execute callback if provided
       cb && cb();
     });
 }
 
+/**
+ * Update the status panel from a full or partial status object
+ *
+ * @param {Object} data - Fields of /get_status; missing fields are left as they are
+ */
+function applyStatus(data) {
+  // Get DOM elements
+  const statusValue = document.getElementById("statusValue");
+  const startBtn = document.getElementById("btn-start");
+  const endBtn = document.getElementById("btn-end");
+  const intervalInput = document.getElementById("intervalInput");
+
+  // Update detection interval placeholder
+  if (data.det_step !== undefined) {
+    intervalInput.placeholder = data.det_step;
+  }
+
+  // Models still loading in the background: nothing is inspected yet
+  if (data.ready !== undefined) {
+    modelsReady = data.ready.ready;
+  }
+
+  // Toggle button visibility and status styling based on inspection state
+  if (data.patrol_status === undefined) {
+    return;
+  }
+  if (data.patrol_status === "Active") {
+    statusValue.textContent = modelsReady ? "ACTIVE" : "ACTIVE (LOADING MODELS)";
+    statusValue.classList.add("active");
+    startBtn.classList.remove("btn-show");
+    endBtn.classList.add("btn-show");
+  } else {
+    statusValue.textContent = modelsReady ? "IDLE" : "IDLE (LOADING MODELS)";
+    statusValue.classList.remove("active");
+    startBtn.classList.add("btn-show");
+    endBtn.classList.remove("btn-show");
+  }
+}
+
 // =============================================================================
 // Detection Interval Configuration
 // =============================================================================
@@ -284,8 +322,9 @@ function endPatrol() {
 // =============================================================================
 
 /**
- * Poll the server for detection results and update display
- * Automatically schedules next poll after completion
+ * Poll the server for detection results newer than the cursor and update display
+ * Automatically schedules next poll after completion; polls again right away
+ * while the server still has more results than fit in one batch
  */
 function updateResults() {
   // Clear existing results timer
@@ -294,22 +333,106 @@ function updateResults() {
     resultTimer = null;
   }
 
-  request("/get_result")
+  let delay = timerTimeout;
+  request(`/get_result?since=${resultCursor}&limit=${resultBatchSize}`)
     .then((data) => {
-      // Reverse array to show newest results first
-      allResults = data.reverse() || [];
-      renderResults();
+      // The catalogue was recreated on the server, start over
+      if (data.latest < resultCursor) {
+        allResults = [];
+        seenResults = new Set();
+        resultCursor = 0;
+        delay = 0;
+        return;
+      }
+
+      if (data.items.length > 0) {
+        addResults(data.items);
+      } else if (allResults.length === 0) {
+        renderResults();
+      }
+      if (data.items.length === resultBatchSize) {
+        delay = 0;
+      }
     })
     .catch((error) => {
       console.error("updateResults Error:", error, error.message);
       showNotification(error.message || error, "error");
     })
     .finally(() => {
-      // Schedule next results poll
-      resultTimer = setTimeout(updateResults, timerTimeout);
+      // Schedule next results poll; with the event channel open only to fetch remaining batches
+      if (!eventsConnected || delay === 0) {
+        resultTimer = setTimeout(updateResults, delay);
+      }
     });
 }
 
+/**
+ * Merge results not loaded yet, keeping the list newest first, and re-render
+ * Events of different cameras and writer threads may arrive out of id order,
+ * so results are merged by id and the cursor only moves forward
+ *
+ * @param {Array} items - Results in any order
+ */
+function addResults(items) {
+  const fresh = items.filter((item) => !seenResults.has(item.id));
+  if (fresh.length === 0) return;
+  fresh.forEach((item) => seenResults.add(item.id));
+  allResults = allResults.concat(fresh).sort((a, b) => b.id - a.id);
+  resultCursor = Math.max(resultCursor, allResults[0].id);
+  renderResults();
+}
+
+// =============================================================================
+// Server-Sent Events
+// =============================================================================
+
+/**
+ * Subscribe to the /events push channel
+ * While it is open, status and results arrive as events and polling stops;
+ * when it drops, polling resumes until the browser reconnects
+ */
+function subscribeEvents() {
+  if (!window.EventSource) {
+    return false;
+  }
+
+  eventSource = new EventSource("/events");
+
+  eventSource.addEventListener("open", () => {
+    eventsConnected = true;
+    pollingStarted = false;
+    // Catch up once on anything missed while disconnected
+    updateStatus();
+    updateResults();
+  });
+
+  eventSource.addEventListener("status", (e) => {
+    applyStatus(JSON.parse(e.data));
+  });
+
+  eventSource.addEventListener("result", (e) => {
+    addResults([JSON.parse(e.data)]);
+  });
+
+  eventSource.addEventListener("error", () => {
+    eventsConnected = false;
+    // Fall back to polling until the channel is (back) open
+    startPolling();
+  });
+
+  return true;
+}
+
+/**
+ * Start the status and results polling loops unless they are already running
+ */
+function startPolling() {
+  if (pollingStarted) return;
+  pollingStarted = true;
+  updateStatus();
+  updateResults();
+}
+
 // =============================================================================
 // Results Rendering with Pagination
 // =============================================================================
@@ -369,7 +492,7 @@ function renderResults() {
 
     card.innerHTML = `
       <img
-        src="${result.path}"
+        src="${result.thumb || result.path}"
         alt="Detected Defect"
         class="defect-card-image"
         loading="lazy"
@@ -598,10 +721,12 @@ document.addEventListener("keydown", (e) => {
 
 /**
  * Initialize the application when page loads
- * - Start status polling
- * - Start results polling
+ * - Subscribe to the event channel
+ * - Fall back to status and results polling without it
  */
 window.onload = () => {
-  updateStatus();
-  updateResults();
+  // The channel's open event starts the first fetch; poll only without it
+  if (!subscribeEvents()) {
+    startPolling();
+  }
 };
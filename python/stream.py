@@ -0,0 +1,94 @@
+#==============================================================================
+#
+# Copyright (c) 2026, Qualcomm Innovation Center, Inc. All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+#
+#==============================================================================
+
+import threading
+
+import cv2
+
+from metrics import METRICS
+
+class StreamHub(object):
+    """
+    StreamHub Class
+
+    Holds the latest JPEG of one MJPEG stream variant and fans it out to every
+    connected client. Each client waits for a frame newer than the last one it
+    sent, so a slow client skips frames on its own without holding back the
+    encoder or the other clients.
+    """
+    def __init__(self, name: str, quality: int = 95, width: int = None):
+        """
+        Args:
+            name: Stream name used in /video_feed?stream=<name>.
+            quality: JPEG quality (0-100).
+            width: Output width in pixels; None keeps the capture resolution.
+        """
+        self.name = name
+        self.quality = quality
+        self.width = width
+        self.cond = threading.Condition()
+        self.frame = None
+        self.seq = 0
+        self.clients = 0
+        self.closed = False
+
+    @classmethod
+    def parse(cls, spec):
+        """
+        Build a hub from a "name:quality[:width]" command line spec.
+        """
+        parts = spec.split(":")
+        if not 2 <= len(parts) <= 3:
+            raise ValueError(f"Invalid stream spec '{spec}', expected name:quality[:width]")
+        width = int(parts[2]) if len(parts) == 3 else None
+        return cls(parts[0], int(parts[1]), width)
+
+    def encode(self, frame):
+        """
+        Encode a BGR frame with this stream's size and quality and publish it.
+        """
+        if self.width is not None and frame.shape[1] != self.width:
+            height = round(frame.shape[0] * self.width / frame.shape[1])
+            frame = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if ret:
+            self.publish(buffer.tobytes())
+
+    def publish(self, data):
+        with self.cond:
+            self.frame = data
+            self.seq += 1
+            self.cond.notify_all()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def subscribe(self):
+        """
+        Generator of multipart MJPEG chunks for one client.
+        """
+        with self.cond:
+            self.clients += 1
+        try:
+            seq = 0
+            while True:
+                with self.cond:
+                    self.cond.wait_for(lambda: self.seq != seq or self.closed)
+                    if self.closed:
+                        return
+                    # A slow client skips frames instead of queueing them; count what it missed.
+                    if seq and self.seq > seq + 1:
+                        METRICS.inc("stream_skipped", self.seq - seq - 1)
+                    data, seq = self.frame, self.seq
+                yield (b'--frame\r\n'
+                       b'Content-Type: image/jpeg\r\n\r\n' + data + b'\r\n')
+        finally:
+            with self.cond:
+                self.clients -= 1
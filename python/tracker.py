@@ -0,0 +1,181 @@
+#==============================================================================
+#
+# Copyright (c) 2026, Qualcomm Innovation Center, Inc. All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+#
+#==============================================================================
+
+import time
+import threading
+
+import cv2
+import numpy as np
+
+from utils import box_iou
+
+class Track(object):
+    """
+    One object followed across inferences.
+    `mask` is the cached SAM2 defect mask, computed for the roi `mask_box`
+    when the crop looked like `signature`. `best` is the best capture so far
+    as (quality, capture), the capture being a FrameJob that owns its frame.
+    """
+    def __init__(self, track_id, box, cls):
+        self.id = track_id
+        self.box = box
+        self.cls = cls
+        self.hits = 1
+        self.misses = 0
+        self.last_seen = time.time()
+        self.mask = None
+        self.mask_box = None
+        self.signature = None
+        self.best = None
+
+class Tracker(object):
+    """
+    Tracker Class
+
+    Greedy IoU association of detections to tracks, with a centroid distance
+    fallback for boxes that moved too far for their IoU to match. Tracks are
+    retired after `max_misses` inferences without a match or `max_idle`
+    seconds without being seen. All methods are thread-safe.
+    """
+    def __init__(self,
+                 iou_threshold: float = 0.3,
+                 max_distance: float = 0.5,
+                 max_misses: int = 3,
+                 max_idle: float = 10.0,
+                 reseg_iou: float = 0.85,
+                 reseg_appearance: float = 12.0,
+                 signature_size: int = 16):
+        """
+        Args:
+            iou_threshold: Minimum IoU for a detection to continue a track.
+            max_distance: Maximum centroid distance for the fallback match, as a fraction of the track's box diagonal.
+            max_misses: Inferences without a match after which a track is retired.
+            max_idle: Seconds without a match after which a track is retired.
+            reseg_iou: SAM2 re-runs when the IoU between the box and the box of the cached mask drops below this.
+            reseg_appearance: SAM2 re-runs when the mean gray level difference of the crop signature exceeds this.
+            signature_size: Side of the grayscale thumbnail used as appearance signature.
+        """
+        self.iou_threshold = iou_threshold
+        self.max_distance = max_distance
+        self.max_misses = max_misses
+        self.max_idle = max_idle
+        self.reseg_iou = reseg_iou
+        self.reseg_appearance = reseg_appearance
+        self.signature_size = signature_size
+        self.tracks = []
+        self.next_id = 1
+        self.lock = threading.Lock()
+
+    def update(self, rois, classes):
+        """
+        Associate this inference's rois (x1, y1, x2, y2) of the given classes with
+        the tracks, starting new tracks for the rest. Returns one Track per roi.
+        """
+        now = time.time()
+        with self.lock:
+            matched = [None] * len(rois)
+            free = list(range(len(self.tracks)))
+            if rois and self.tracks:
+                boxes = np.array(rois, dtype=np.float32)
+                iou = box_iou(boxes, np.array([t.box for t in self.tracks], dtype=np.float32))
+                same = np.array(classes)[:, None] == np.array([t.cls for t in self.tracks])[None, :]
+                iou[~same] = 0.0
+                # Greedy on IoU, best pairs first.
+                for i, j in zip(*np.unravel_index(np.argsort(-iou, axis=None), iou.shape)):
+                    if iou[i, j] < self.iou_threshold:
+                        break
+                    if matched[i] is None and j in free:
+                        matched[i] = self.tracks[j]
+                        free.remove(j)
+                # Centroid fallback for fast movers.
+                for i, roi in enumerate(rois):
+                    if matched[i] is not None:
+                        continue
+                    best, best_dist = None, None
+                    for j in free:
+                        track = self.tracks[j]
+                        if track.cls != classes[i]:
+                            continue
+                        dist = np.hypot(*(self._center(roi) - self._center(track.box)))
+                        diag = np.hypot(track.box[2] - track.box[0], track.box[3] - track.box[1])
+                        if dist <= self.max_distance * diag and (best_dist is None or dist < best_dist):
+                            best, best_dist = j, dist
+                    if best is not None:
+                        matched[i] = self.tracks[best]
+                        free.remove(best)
+
+            for j in free:
+                self.tracks[j].misses += 1
+            for i, roi in enumerate(rois):
+                track = matched[i]
+                if track is None:
+                    track = Track(self.next_id, roi, classes[i])
+                    self.next_id += 1
+                    self.tracks.append(track)
+                    matched[i] = track
+                else:
+                    track.box = roi
+                    track.hits += 1
+                    track.misses = 0
+                    track.last_seen = now
+            return matched
+
+    def signature(self, crop):
+        """
+        Appearance signature of a BGR/RGB crop: a small grayscale thumbnail.
+        """
+        small = cv2.resize(crop, (self.signature_size, self.signature_size), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_RGB2GRAY).astype(np.float32)
+
+    def cached_mask(self, track, roi, signature):
+        """
+        The track's cached defect mask scaled to `roi`, or None when SAM2 has to
+        run because the track is new or its box or appearance changed.
+        """
+        with self.lock:
+            mask, mask_box, cached = track.mask, track.mask_box, track.signature
+        if mask is None:
+            return None
+        if box_iou(np.array([roi], dtype=np.float32), np.array([mask_box], dtype=np.float32))[0, 0] < self.reseg_iou:
+            return None
+        if np.abs(signature - cached).mean() > self.reseg_appearance:
+            return None
+        x1, y1, x2, y2 = roi
+        if mask.shape != (y2 - y1, x2 - x1):
+            mask = cv2.resize(mask, (x2 - x1, y2 - y1), interpolation=cv2.INTER_NEAREST)
+        return mask
+
+    def cache(self, track, roi, signature, mask):
+        with self.lock:
+            track.mask, track.mask_box, track.signature = mask, roi, signature
+
+    def offer(self, track, quality, capture_fn):
+        """
+        Keep this capture if it beats the track's best; capture_fn() makes the copy to keep.
+        """
+        with self.lock:
+            if track.best is not None and track.best[0] >= quality:
+                return
+        capture = capture_fn()
+        with self.lock:
+            if track.best is None or track.best[0] < quality:
+                track.best = (quality, capture)
+
+    def retire(self, now = None, everything = False):
+        """
+        Remove and return the tracks that missed too many inferences or were idle too long.
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            done = [t for t in self.tracks if everything or t.misses >= self.max_misses or now - t.last_seen > self.max_idle]
+            self.tracks = [t for t in self.tracks if t not in done]
+        return done
+
+    @staticmethod
+    def _center(box):
+        return np.array([(box[0] + box[2]) / 2.0, (box[1] + box[3]) / 2.0])
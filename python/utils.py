@@ -20,18 +20,53 @@ CLASSES = ("person", "bicycle", "car", "motorbike ", "aeroplane ", "bus ", "trai
 def sigmoid(x):
     return 1 / (1 + np.exp(-x))
 
-def eqprocess(image, size1, size2):
-    h,w,_ = image.shape
-    mask = np.zeros((size1,size2,3),dtype=np.float32)
-    scale1 = h /size1
-    scale2 = w / size2
-    if scale1 > scale2:
-        scale = scale1
-    else:
-        scale = scale2
-    img = cv2.resize(image,(int(w / scale),int(h / scale)))
-    mask[:int(h / scale),:int(w / scale),:] = img
-    return mask, scale
+class Letterbox(object):
+    '''
+    Letterbox preprocessor owning persistent buffers.
+    The image is resized straight into the top-left of a reused uint8 canvas,
+    and a per-channel float32 lookup table applies (pixel * scale - mean) / std
+    while writing the canvas into a reused float32 output buffer. After the
+    buffers exist a call allocates nothing. The returned array is a view that
+    the next call overwrites.
+    '''
+    def __init__(self, height, width, scale = 1.0, mean = (0.0, 0.0, 0.0), std = (1.0, 1.0, 1.0), batch = 1):
+        self.height = height
+        self.width = width
+        self.canvas = np.zeros((height, width, 3), dtype=np.uint8)
+        self.region = (0, 0)
+        values = np.arange(256, dtype=np.float64)[:, None] * scale
+        self.lut = ((values - np.asarray(mean)) / np.asarray(std)).astype(np.float32)[None]
+        self.buffer = np.empty((batch, height, width, 3), dtype=np.float32)
+
+    def reserve(self, batch):
+        '''
+        Make room for `batch` outputs, keeping the current buffer if it is large enough.
+        '''
+        if len(self.buffer) < batch:
+            self.buffer = np.empty((batch, self.height, self.width, 3), dtype=np.float32)
+        return self.buffer[:batch]
+
+    def __call__(self, image, index = 0):
+        '''
+        Letterbox `image` into output `index`. Returns (output view, scale).
+        '''
+        h, w = image.shape[:2]
+        scale = max(h / self.height, w / self.width)
+        nh, nw = int(h / scale), int(w / scale)
+
+        canvas = self.canvas
+        ph, pw = self.region
+        # Clear what the previous image left outside the new region.
+        if ph > nh:
+            canvas[nh:ph, :pw] = 0
+        if pw > nw:
+            canvas[:min(nh, ph), nw:pw] = 0
+        cv2.resize(image, (nw, nh), dst=canvas[:nh, :nw])
+        self.region = (nh, nw)
+
+        out = self.buffer[index]
+        cv2.LUT(canvas, self.lut, dst=out)
+        return out, scale
 
 def xywh2xyxy(x):
     '''
@@ -51,32 +86,61 @@ def xyxy2xywh(box):
     box[:, 2:] = box[:, 2:] - box[:, :2]
     return box
 
-def NMS(dets, scores, thresh):
+# Above this many candidates the pairwise IoU matrix gets too large and NMS
+# falls back to row-by-row suppression.
+NMS_MATRIX_LIMIT = 1024
+
+def box_iou(boxes1, boxes2):
     '''
-    dets.shape = (N, 5), (left_top x, left_top y, right_bottom x, right_bottom y, Scores)
+    Pairwise IoU of (N, 4) and (M, 4) boxes in (x1, y1, x2, y2), with the
+    inclusive-pixel (+1) convention NMS uses. Returns an (N, M) matrix.
+    '''
+    area1 = (boxes1[:, 2] - boxes1[:, 0] + 1) * (boxes1[:, 3] - boxes1[:, 1] + 1)
+    area2 = (boxes2[:, 2] - boxes2[:, 0] + 1) * (boxes2[:, 3] - boxes2[:, 1] + 1)
+    w = np.maximum(0, np.minimum(boxes1[:, None, 2], boxes2[None, :, 2]) - np.maximum(boxes1[:, None, 0], boxes2[None, :, 0]) + 1)
+    h = np.maximum(0, np.minimum(boxes1[:, None, 3], boxes2[None, :, 3]) - np.maximum(boxes1[:, None, 1], boxes2[None, :, 1]) + 1)
+    overlaps = w * h
+    return overlaps / (area1[:, None] + area2[None, :] - overlaps)
+
+def NMS(dets, scores, thresh, classes = None, top_k = None, max_det = None):
+    '''
+    dets.shape = (N, 4+), (left_top x, left_top y, right_bottom x, right_bottom y, ...)
+    classes: optional (N,) class ids; boxes of different classes never suppress each other.
+    top_k: only the top_k highest scoring boxes take part in suppression.
+    max_det: maximum number of boxes kept.
+    Returns the kept indices, highest score first.
     '''
-    x1 = dets[:,0]
-    y1 = dets[:,1]
-    x2 = dets[:,2]
-    y2 = dets[:,3]
-    areas = (y2-y1+1) * (x2-x1+1)
-    keep = []
     index = scores.argsort()[::-1]
-    while index.size >0:
-        i = index[0]       # every time the first is the biggst, and add it directly
-        keep.append(i)
-        x11 = np.maximum(x1[i], x1[index[1:]])    # calculate the points of overlap 
-        y11 = np.maximum(y1[i], y1[index[1:]])
-        x22 = np.minimum(x2[i], x2[index[1:]])
-        y22 = np.minimum(y2[i], y2[index[1:]])
-        w = np.maximum(0, x22-x11+1)    # the weights of overlap
-        h = np.maximum(0, y22-y11+1)    # the height of overlap
-        overlaps = w*h
-        ious = overlaps / (areas[i]+areas[index[1:]] - overlaps)
-        idx = np.where(ious<=thresh)[0]
-        index = index[idx+1]   # because index start from 1
- 
-    return keep
+    if top_k is not None:
+        index = index[:top_k]
+    if max_det is None:
+        max_det = len(index)
+
+    boxes = dets[index, :4]
+    if classes is not None:
+        # Shift every class into its own coordinate range so one suppression pass covers all classes.
+        offset = boxes.max() - boxes.min() + 2 if len(boxes) else 0
+        boxes = boxes + (np.asarray(classes)[index] * offset)[:, None]
+
+    keep = []
+    if len(index) <= NMS_MATRIX_LIMIT:
+        suppressed = np.triu(box_iou(boxes, boxes) > thresh, 1)
+        removed = np.zeros(len(index), dtype=bool)
+        for i in range(len(index)):
+            if removed[i]:
+                continue
+            keep.append(i)
+            if len(keep) >= max_det:
+                break
+            removed |= suppressed[i]
+    else:
+        order = np.arange(len(index))
+        while order.size > 0 and len(keep) < max_det:
+            i = order[0]        # every time the first is the biggst, and add it directly
+            keep.append(i)
+            ious = box_iou(boxes[i:i + 1], boxes[order[1:]])[0]
+            order = order[1:][ious <= thresh]
+    return index[keep]
 
 def draw_detect_res(img, det_pred, segments):
     if det_pred is None:
@@ -97,38 +161,93 @@ def draw_detect_res(img, det_pred, segments):
     return img
 
 
-def scale_mask(masks, in_shape):
-    anti_size = max(in_shape)
-    masks = cv2.resize(masks, (anti_size, anti_size),
-                        interpolation=cv2.INTER_LINEAR)
-    if len(masks.shape) == 2:
-        masks = masks[:, :, None]
-    masks = masks[:in_shape[0],:in_shape[1],:]
-    return masks
-
-def crop_mask(masks, boxes):
-    n, h, w = masks.shape
-    x1, y1, x2, y2 = np.split(boxes[:, :, None], 4, 1)
-    r = np.arange(w, dtype=x1.dtype)[None, None, :]
-    c = np.arange(h, dtype=x1.dtype)[None, :, None]
-    return masks * ((r >= x1) * (r < x2) * (c >= y1) * (c < y2))
+def group_boxes(boxes, gap = 1):
+    '''
+    Partition (x1, y1, x2, y2) boxes into groups of boxes that overlap or lie
+    within `gap` pixels of each other, directly or through other boxes of the
+    group. Returns lists of box indices.
+    '''
+    parent = list(range(len(boxes)))
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    for i, (ax1, ay1, ax2, ay2) in enumerate(boxes):
+        for j in range(i):
+            bx1, by1, bx2, by2 = boxes[j]
+            if ax1 <= bx2 + gap and bx1 <= ax2 + gap and ay1 <= by2 + gap and by1 <= ay2 + gap:
+                parent[find(i)] = find(j)
+    groups = {}
+    for i in range(len(boxes)):
+        groups.setdefault(find(i), []).append(i)
+    return list(groups.values())
 
 def process_mask(protos, masks_in, bboxes, in_shape):
+    '''
+    Decode instance masks inside their boxes only.
+    protos: (C, mh, mw) prototypes covering the letterboxed input,
+    masks_in: (N, C) mask coefficients, bboxes: (N, 4) boxes in in_shape pixels.
+    For each box the prototypes under it are combined at proto resolution, and
+    only that patch is upsampled (with the same pixel-centre mapping as resizing
+    the whole proto grid to the letterbox size) and thresholded.
+    Returns a list of (x, y, mask): a bool mask of the box region whose top-left
+    pixel is (x, y) in the image.
+    '''
     c, mh, mw = protos.shape
-    masks = np.matmul(masks_in, protos.reshape((c, -1))).reshape((-1, mh, mw)).transpose(1, 2, 0)  # HWN
-    masks = np.ascontiguousarray(masks)
-    masks = scale_mask(masks, in_shape)  # re-scale mask from P3 shape to original input image shape
-    masks = np.einsum('HWN -> NHW', masks)  # HWN -> NHW
-    masks = crop_mask(masks, bboxes)
-    return np.greater(masks, 0.5)
+    h, w = in_shape[:2]
+    anti_size = max(h, w)
+    sx, sy = anti_size / mw, anti_size / mh
+
+    masks = []
+    for coef, box in zip(masks_in, bboxes):
+        # Pixels whose index lies in [x1, x2) x [y1, y2), clipped to the image.
+        x1, x2 = np.clip(np.ceil(box[[0, 2]]), 0, w).astype(int)
+        y1, y2 = np.clip(np.ceil(box[[1, 3]]), 0, h).astype(int)
+        if x2 <= x1 or y2 <= y1:
+            masks.append((x1, y1, np.zeros((0, 0), dtype=bool)))
+            continue
+
+        # Proto cells the bilinear taps of the box pixels fall on.
+        px1 = max(0, int(np.floor((x1 + 0.5) / sx - 0.5)) - 1)
+        px2 = min(mw, int(np.floor((x2 - 0.5) / sx - 0.5)) + 2)
+        py1 = max(0, int(np.floor((y1 + 0.5) / sy - 0.5)) - 1)
+        py2 = min(mh, int(np.floor((y2 - 0.5) / sy - 0.5)) + 2)
+        patch = np.matmul(coef, protos[:, py1:py2, px1:px2].reshape(c, -1)).reshape(py2 - py1, px2 - px1)
+
+        m = np.float32([[1 / sx, 0, (x1 + 0.5) / sx - 0.5 - px1],
+                        [0, 1 / sy, (y1 + 0.5) / sy - 0.5 - py1]])
+        patch = cv2.warpAffine(patch.astype(np.float32), m, (int(x2 - x1), int(y2 - y1)),
+                               flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP, borderMode=cv2.BORDER_REPLICATE)
+        masks.append((x1, y1, patch > 0.5))
+    return masks
 
 def masks2segments(masks):
+    '''
+    Largest outer contour of each (x, y, mask) from process_mask, in image coordinates.
+    '''
     segments = []
-    for x in masks.astype('uint8'):
-        c = cv2.findContours(x, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)[0]  # CHAIN_APPROX_SIMPLE
+    for x, y, mask in masks:
+        c = ()
+        if mask.size > 0:
+            c = cv2.findContours(mask.view(np.uint8), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE, offset=(int(x), int(y)))[0]  # CHAIN_APPROX_SIMPLE
         if c:
             c = np.array(c[np.array([len(x) for x in c]).argmax()]).reshape(-1, 2)
         else:
             c = np.zeros((0, 2))  # no segments found
         segments.append(c.astype('float32'))
     return segments
+
+def rle_encode(mask):
+    '''
+    Run-length encode a binary mask in row-major order.
+    Returns {"size": [h, w], "counts": [...]}, where counts alternate between
+    runs of zeros and non-zeros, starting with zeros.
+    '''
+    flat = np.asarray(mask).reshape(-1) > 0
+    edges = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+    bounds = np.concatenate(([0], edges, [flat.size]))
+    counts = np.diff(bounds).tolist()
+    if flat.size > 0 and flat[0]:
+        counts.insert(0, 0)
+    return {"size": list(mask.shape[:2]), "counts": counts}
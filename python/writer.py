@@ -0,0 +1,151 @@
+#==============================================================================
+#
+# Copyright (c) 2026, Qualcomm Innovation Center, Inc. All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+#
+#==============================================================================
+
+import os
+import json
+import threading
+import traceback
+import multiprocessing as mp
+
+import cv2
+
+from pipeline import DropQueue
+from metrics import METRICS
+
+# Extension and quality flag of each supported encoder.
+ENCODERS = {
+    "jpg": (".jpg", cv2.IMWRITE_JPEG_QUALITY),
+    "png": (".png", cv2.IMWRITE_PNG_COMPRESSION),
+    "webp": (".webp", cv2.IMWRITE_WEBP_QUALITY),
+}
+
+def result_name(timestamp):
+    """
+    File name stem of a result saved at `timestamp`.
+    """
+    return timestamp.strftime("%Y_%m_%d_%H_%M_%S_%f")[:-3]
+
+# Serializes the writer threads updating WriterStats. Process-local, so an
+# inference process that dies cannot leave the WebUI's readers waiting on it.
+STATS_LOCK = threading.Lock()
+
+class WriterStats(object):
+    """
+    Save counters in shared memory, so the writer in the inference process can
+    be watched from the WebUI process. Written by one process only.
+    """
+    FIELDS = ("saved", "failed", "dropped")
+
+    def __init__(self):
+        self.values = mp.RawArray('q', len(self.FIELDS))
+
+    def add(self, field, count = 1):
+        index = self.FIELDS.index(field)
+        with STATS_LOCK:
+            self.values[index] += count
+
+    def as_dict(self):
+        return dict(zip(self.FIELDS, self.values[:]))
+
+class ResultWriter(object):
+    """
+    ResultWriter Class
+
+    Encodes and writes result frames on a small pool of background threads so
+    storage latency never blocks inference. Frames wait in a bounded queue; when
+    it is full the oldest pending frame is dropped. Drops and failed writes are
+    counted in `stats` instead of being raised.
+    """
+    def __init__(self,
+                 save_dir: str,
+                 format: str = "jpg",
+                 quality: int = None,
+                 sidecar: bool = False,
+                 workers: int = 2,
+                 maxsize: int = 8,
+                 stats: WriterStats = None,
+                 on_saved = None):
+        """
+        Args:
+            save_dir: Directory the results are written to.
+            format: Image encoder, one of ENCODERS.
+            quality: JPEG/WebP quality (0-100) or PNG compression level (0-9); None keeps the OpenCV default.
+            sidecar: Also write a <name>.json with the boxes, class ids and RLE defect masks.
+            workers: Number of writer threads.
+            maxsize: Frames that may wait for a writer before the oldest is dropped.
+            stats: Shared WriterStats (a private one is created when None).
+            on_saved: Called with (filename, timestamp) from a writer thread after each saved result.
+        """
+        if format not in ENCODERS:
+            raise ValueError(f"Unsupported format '{format}', expected one of {', '.join(ENCODERS)}")
+        self.save_dir = save_dir
+        self.ext, flag = ENCODERS[format]
+        self.params = [flag, quality] if quality is not None else []
+        self.sidecar = sidecar
+        self.stats = stats if stats is not None else WriterStats()
+        self.on_saved = on_saved
+        self.queue = DropQueue(maxsize, drop=True, on_drop=lambda item: self.stats.add("dropped"))
+        self.threads = [threading.Thread(target=self._loop, name=f"writer-{i}", daemon=True) for i in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, image, timestamp, meta = None, suffix = ""):
+        """
+        Queue an RGB image for saving. The writer takes ownership of `image`,
+        so pass a copy of anything that is reused afterwards. `meta` is the
+        JSON-serialisable sidecar content, written only when sidecars are enabled.
+        `suffix` is appended to the timestamp-based file name.
+        """
+        self.queue.put((image, timestamp, meta, suffix))
+
+    def close(self, timeout = None):
+        """
+        Stop accepting frames and wait for the queued ones to be written.
+        """
+        self.queue.close()
+        for thread in self.threads:
+            thread.join(timeout)
+
+    def _loop(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            try:
+                filename = self._write(*item)
+            except Exception:
+                self.stats.add("failed")
+                traceback.print_exc()
+                continue
+            self.stats.add("saved")
+            if self.on_saved is not None:
+                try:
+                    self.on_saved(filename, item[1])
+                except Exception:
+                    traceback.print_exc()
+
+    def _write(self, image, timestamp, meta, suffix):
+        name = result_name(timestamp) + suffix
+        with METRICS.time("save_encode"):
+            ret, buffer = cv2.imencode(self.ext, cv2.cvtColor(image, cv2.COLOR_RGB2BGR), self.params)
+        if not ret:
+            raise RuntimeError(f"Failed to encode {name}{self.ext}")
+
+        with METRICS.time("save_write"):
+            # The sidecar goes first so whoever sees the image can rely on it being there.
+            if self.sidecar and meta is not None:
+                self._replace(name + ".json", json.dumps(meta, separators=(",", ":")).encode())
+            self._replace(name + self.ext, buffer.tobytes())
+        return name + self.ext
+
+    def _replace(self, filename, data):
+        # Write to a temporary name first so readers never see a partial file.
+        path = os.path.join(self.save_dir, filename)
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
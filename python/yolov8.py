@@ -6,14 +6,24 @@
 #
 #==============================================================================
 
-import os
+import time
+
 import numpy as np
 
-from utils import eqprocess, xywh2xyxy, NMS, process_mask, masks2segments
-import infertoypy
+from metrics import METRICS
+from utils import Letterbox, xywh2xyxy, NMS, process_mask, masks2segments
+from backend import create_backend, yolov8_synthetic
 
 class Yolov8Seg(object):
-    def __init__(self, model_path, width, height, class_num):
+    def __init__(self, model_path, width, height, class_num, backend = "qnn", **backend_options):
+        """
+        Args:
+            model_path: Path to the YOLOv8-seg QNN context binary.
+            width, height: Model input size.
+            class_num: Number of classes the model predicts.
+            backend: Backend name ("qnn", "numpy") or a Backend instance.
+            backend_options: Extra arguments for the NumPy stand-in (latency, seed).
+        """
         self.class_num = class_num
         self.width = width
         self.height = height
@@ -21,49 +31,92 @@ class Yolov8Seg(object):
         self.blocks = int(height * width * ( 1 / 64 + 1 / 256 + 1 / 1024))
         self.maskw = int(width / 4)
         self.maskh = int(height / 4)
+        self.letterbox = Letterbox(height, width, scale=1 / 255.)
 
+        self.model = create_backend(backend, model_path, yolov8_synthetic(width, height, class_num), **backend_options)
 
-        self.model = infertoypy.InferToy()
-        res = self.model.init([
-            "qnn-sample-app",
-            "--retrieve_context", model_path,
-            "--backend", os.path.join(os.environ['ADSP_LIBRARY_PATH'], "libQnnHtp.so"),
-            "--system_library", os.path.join(os.environ['ADSP_LIBRARY_PATH'], "libQnnSystem.so"),
-            "--log_level", "error",
-        ])
-
-    def __call__(self, frame, conf_threshold = 0.6, iou_threshold = 0.5):
-        img, scale = eqprocess(frame, self.height, self.width)
-        img = img /255.
-        img = img.astype(np.float32)
+    def __call__(self, frame, conf_threshold = 0.6, iou_threshold = 0.5, top_k = 3000, max_det = 300, classes = None):
+        """
+        Detect and segment one RGB frame.
+        Returns (boxes, segments): (N, 6+32) rows of x1, y1, x2, y2, score, class id
+        and mask coefficients in frame pixels, and one polygon per box; or (None, None).
 
+        Args:
+            classes: Class IDs to decode, None for all. Boxes of other classes are
+                dropped before NMS and mask decoding instead of after.
+        """
+        start = time.perf_counter()
+        img, scale = self.letterbox(frame)
         res = self.model.set(0, img)
+        t_run = time.perf_counter()
         self.model.run()
+        t_decode = time.perf_counter()
+        METRICS.observe("yolov8_preprocess", t_run - start)
+        METRICS.observe("yolov8_run", t_decode - t_run)
 
-        protos, data_len = self.model.get(0)
-        input0_data, data_len = self.model.get(3)
-        input1_data, data_len = self.model.get(2)
-        input2_data, data_len = self.model.get(1)
-        
-        input0_data = input0_data.reshape(1, 4, self.blocks)
-        input1_data = input1_data.reshape(1, self.class_num, self.blocks)
-        input2_data = input2_data.reshape(1, 32, self.blocks)
-        protos = protos.reshape(1, self.maskh, self.maskw, 32).transpose(0,3,1,2)
-        
-        boxes = np.concatenate([input0_data, input1_data, input2_data], axis = 1)
-        x = boxes.transpose(0,2,1)
-        x = x[np.amax(x[..., 4:-32], axis=-1) > conf_threshold]
-
-        if len(x) > 0:
-            x = np.c_[x[..., :4], np.amax(x[..., 4:-32], axis=-1), np.argmax(x[..., 4:-32], axis=-1), x[..., -32:]]
+        x = self.decode(conf_threshold, classes)
+        if x is not None:
             x[:, :4] = xywh2xyxy(x[:, :4])
-            index = NMS(x[:, :4], x[:, 4], iou_threshold)
+            t_nms = time.perf_counter()
+            index = NMS(x[:, :4], x[:, 4], iou_threshold, classes=x[:, 5], top_k=top_k, max_det=max_det)
             out_boxes = x[index]
             out_boxes[..., :4] = out_boxes[..., :4]  * scale
-            masks = process_mask(protos[0], out_boxes[:, -32:], out_boxes[:, :4], frame.shape)
+            t_mask = time.perf_counter()
+            protos, data_len = self.model.get(0)
+            protos = protos.reshape(self.maskh, self.maskw, 32).transpose(2, 0, 1)
+            masks = process_mask(protos, out_boxes[:, -32:], out_boxes[:, :4], frame.shape)
             segments = masks2segments(masks)
+            METRICS.observe("yolov8_decode", t_nms - t_decode)
+            METRICS.observe("yolov8_nms", t_mask - t_nms)
+            METRICS.observe("yolov8_masks", time.perf_counter() - t_mask)
             return out_boxes, segments
+        METRICS.observe("yolov8_decode", time.perf_counter() - t_decode)
         return None, None
-    
+
+    def decode(self, conf_threshold, classes = None):
+        """
+        Candidates of the last run as (K, 4+2+32) rows of center x, center y, width,
+        height, score, class id and mask coefficients, or None when there are none.
+        The per-output tensors are read in place: the confidence mask is computed
+        once over the class scores, and boxes, class ids and coefficients are
+        gathered for the surviving anchors only. With `classes`, a candidate keeps
+        its top class over all classes and is dropped when that class is not requested.
+        """
+        scores = self.model.get(2)[0].reshape(self.class_num, self.blocks)
+        if classes is not None:
+            classes = [c for c in classes if 0 <= c < self.class_num]
+            if not classes:
+                return None
+            if len(classes) == self.class_num:
+                classes = None
+        # An anchor whose top class is requested and confident has a requested row above
+        # the threshold, so only those rows are scanned to find the candidates.
+        candidates = scores if classes is None else scores[classes]
+        best = candidates.max(axis=0) if len(candidates) > 1 else candidates[0]
+        keep = np.flatnonzero(best > conf_threshold)
+        if len(keep) == 0:
+            return None
+
+        class_ids = scores[:, keep].argmax(axis=0) if self.class_num > 1 else np.zeros(len(keep), dtype=int)
+        if classes is not None:
+            requested = np.isin(class_ids, classes)
+            keep, class_ids = keep[requested], class_ids[requested]
+            if len(keep) == 0:
+                return None
+        x = np.empty((len(keep), 4 + 2 + 32), dtype=np.float32)
+        x[:, :4] = self.model.get(3)[0].reshape(4, self.blocks)[:, keep].T
+        x[:, 4] = best[keep]
+        x[:, 5] = class_ids
+        x[:, 6:] = self.model.get(1)[0].reshape(32, self.blocks)[:, keep].T
+        return x
+
+    def warmup(self, runs = 1):
+        """
+        Run the model `runs` times on a blank frame.
+        """
+        frame = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        for _ in range(runs):
+            self(frame)
+
     def __del__(self):
         self.model.destroy()
\ No newline at end of file